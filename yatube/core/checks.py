@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core import checks
+
+
+@checks.register(checks.Tags.caches)
+def check_ratelimit_cache(app_configs, **kwargs):
+    """Корзины лимитов должны лежать в общем для процессов кеше.
+
+    В LocMemCache у каждого процесса свои корзины, и настоящий лимит
+    равен заданному, умноженному на число процессов.
+    """
+    if not getattr(settings, 'RATELIMIT_ENABLED', True):
+        return []
+    alias = getattr(settings, 'RATELIMIT_CACHE', 'default')
+    if alias == 'default':
+        shared = getattr(settings, 'SHARED_CACHE', True)
+    else:
+        shared = not settings.CACHES[alias]['BACKEND'].endswith(
+            '.LocMemCache'
+        )
+    if shared:
+        return []
+    return [checks.Warning(
+        'Лимиты частоты запросов считаются отдельно в каждом процессе.',
+        hint='Настройте общий кеш (YATUBE_CACHE_BACKEND).',
+        id='core.W001',
+    )]
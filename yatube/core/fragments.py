@@ -0,0 +1,89 @@
+import functools
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+CACHE_TIME = 10 * 60
+PLACEHOLDER = '<!--fragment:{}-->'
+VERSION_KEY = 'fragment:version:{}'
+FRAGMENT_KEY = 'fragment:{}:{}:{}:{}'
+# Разметка из шаблонов; текст пользователей экранируется и совпасть
+# с заглушкой не может.
+_PLACEHOLDER = re.compile(r'<!--fragment:([\w/.-]+\.html)-->')
+
+
+def defer(view):
+    """Откладывает пользовательские фрагменты страницы до middleware.
+
+    Тело страницы тогда одно для всех и его можно кешировать целиком:
+    шапку и переключатель лент для конкретного посетителя подставит
+    FragmentMiddleware. Ставится снаружи cache_page, чтобы сработать
+    и при попадании в кеш.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.fragments_deferred = True
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def is_deferred(request):
+    return getattr(request, 'fragments_deferred', False)
+
+
+def placeholder(name):
+    return PLACEHOLDER.format(name)
+
+
+def enabled():
+    # Версию фрагментов поднимает процесс, обработавший изменение
+    # (часто воркер задач): с LocMemCache остальные процессы отдавали
+    # бы старую шапку, поэтому без общего кеша фрагменты не кешируются.
+    return getattr(settings, 'SHARED_CACHE', True)
+
+
+def invalidate(user_id):
+    """Сбрасывает закешированные фрагменты пользователя."""
+    try:
+        cache.incr(VERSION_KEY.format(user_id))
+    except ValueError:
+        cache.set(VERSION_KEY.format(user_id), 1, None)
+
+
+def render(name, request):
+    """Фрагмент для посетителя, закешированный до смены его данных.
+
+    В ключ входит имя представления: шапка подсвечивает текущий
+    раздел.
+    """
+    if not enabled():
+        return render_to_string(name, request=request)
+    user_id = request.user.pk
+    version = (
+        cache.get_or_set(VERSION_KEY.format(user_id), 1, None)
+        if user_id is not None else 0
+    )
+    match = getattr(request, 'resolver_match', None)
+    key = FRAGMENT_KEY.format(
+        name, user_id, version, match and match.view_name
+    )
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(name, request=request)
+        cache.set(key, html, CACHE_TIME)
+    return html
+
+
+def fill(content, request):
+    """Подставляет фрагменты посетителя вместо заглушек."""
+    rendered = {}
+
+    def replace(match):
+        name = match.group(1)
+        if name not in rendered:
+            rendered[name] = render(name, request)
+        return rendered[name]
+
+    return _PLACEHOLDER.sub(replace, content)
@@ -0,0 +1,230 @@
+import collections
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Value
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+import requests
+from django.db import OperationalError, connections
+from django.urls import reverse
+
+from .slowlog import percentile
+
+# «database is locked» для файла и «database table is locked» для
+# общей памяти SQLite в тестах.
+LOCK_MESSAGE = 'is locked'
+DEFAULT_MIX = {'index': 50, 'follow': 25, 'comment': 15, 'create': 10}
+
+
+def parse_mix(text):
+    """'index=50,follow=25' → {'index': 50, 'follow': 25}."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Один запрос на соединение, как у синхронных воркеров gunicorn.
+
+    Простаивающее keep-alive соединение заняло бы поток сервера из
+    фиксированного пула, поэтому обработчик из wsgiref (HTTP/1.0)
+    подходит лучше обработчика runserver.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGI-сервер, обслуживающий запросы фиксированным пулом потоков."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, threads):
+        super().__init__(address, QuietRequestHandler)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class ServerErrors:
+    """Исключения в представлениях, общие для всех процессов сервера."""
+
+    def __init__(self):
+        self.total = Value('i', 0)
+        self.locked = Value('i', 0)
+
+    def __call__(self, sender, request=None, **kwargs):
+        error = sys.exc_info()[1]
+        with self.total.get_lock():
+            self.total.value += 1
+        if isinstance(error, OperationalError) and LOCK_MESSAGE in str(error):
+            with self.locked.get_lock():
+                self.locked.value += 1
+
+
+class Server:
+    """Приложение из yatube/wsgi.py на локальном порту.
+
+    При processes > 1 слушающий сокет создаётся до fork, и дочерние
+    процессы принимают соединения с него наравне с родителем.
+    """
+
+    def __init__(self, application, port=0, threads=8, processes=1):
+        self.httpd = PooledWSGIServer(('127.0.0.1', port), threads)
+        self.httpd.set_app(application)
+        self.processes = processes
+        self.children = []
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        # Соединения с базой не должны достаться дочерним процессам.
+        connections.close_all()
+        for _ in range(self.processes - 1):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    self.httpd.serve_forever()
+                finally:
+                    os._exit(0)
+            self.children.append(pid)
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        for pid in self.children:
+            os.kill(pid, 15)
+            os.waitpid(pid, 0)
+        self.httpd.shutdown()
+        self.httpd.pool.shutdown(wait=True)
+        self.httpd.server_close()
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+
+    def add(self, action, latency, ok):
+        with self.lock:
+            self.latencies[action].append(latency)
+            if not ok:
+                self.errors[action] += 1
+
+    def summary(self, elapsed):
+        rows = []
+        for action in sorted(self.latencies):
+            latencies = sorted(self.latencies[action])
+            rows.append({
+                'action': action,
+                'requests': len(latencies),
+                'errors': self.errors[action],
+                'rps': len(latencies) / elapsed,
+                'p50': percentile(latencies, 0.5) * 1000,
+                'p95': percentile(latencies, 0.95) * 1000,
+                'p99': percentile(latencies, 0.99) * 1000,
+            })
+        return rows
+
+
+class Client:
+    """Пользователь нагрузки: своя сессия requests и свой набор действий."""
+
+    def __init__(self, base_url, username=None, password=None, post_ids=(),
+                 group_ids=()):
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.anonymous = requests.Session()
+        self.post_ids = list(post_ids)
+        self.group_ids = list(group_ids)
+        if username is not None:
+            self.login(username, password)
+
+    def url(self, name, *args):
+        return self.base_url + reverse(name, args=args)
+
+    def post(self, url, data):
+        # Редирект после записи не входит в замер самой записи.
+        return self.session.post(
+            url,
+            data,
+            headers={
+                'X-CSRFToken': self.session.cookies.get('csrftoken', ''),
+                'Referer': url,
+            },
+            allow_redirects=False,
+        )
+
+    def login(self, username, password):
+        url = self.url('users:login')
+        self.session.get(url)
+        self.post(url, {'username': username, 'password': password})
+
+    def index(self):
+        return self.anonymous.get(self.url('posts:index'))
+
+    def follow(self):
+        return self.session.get(self.url('posts:follow_index'))
+
+    def comment(self):
+        post_id = random.choice(self.post_ids)
+        return self.post(
+            self.url('posts:add_comment', post_id),
+            {'text': 'Комментарий нагрузки'},
+        )
+
+    def create(self):
+        data = {'text': 'Пост нагрузки'}
+        if self.group_ids:
+            data['group'] = random.choice(self.group_ids)
+        return self.post(self.url('posts:post_create'), data)
+
+
+def replay(clients, mix, duration, results):
+    """Гоняет клиентов по взвешенной смеси действий duration секунд."""
+    actions = list(mix)
+    weights = [mix[action] for action in actions]
+    deadline = time.monotonic() + duration
+
+    def worker(client):
+        while time.monotonic() < deadline:
+            action = random.choices(actions, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = getattr(client, action)()
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            results.add(action, time.perf_counter() - started, ok)
+
+    threads = [
+        threading.Thread(target=worker, args=(client,)) for client in clients
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
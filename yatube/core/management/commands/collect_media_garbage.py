@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from core import media
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из MEDIA_ROOT файлы, на которые не ссылается ни одна '
+        'запись, вместе с их миниатюрами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.',
+        )
+        parser.add_argument(
+            '--quarantine', metavar='DIR',
+            help='Переносить файлы в этот каталог вместо удаления.',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=media.MIN_AGE,
+            help='Не трогать файлы моложе стольких секунд.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=media.BATCH_SIZE,
+        )
+
+    def report(self, name, size):
+        self.stdout.write(f'{name} ({size} байт)')
+
+    def handle(self, *args, **options):
+        verbose = options['verbosity'] > 1 or options['dry_run']
+        found, size = media.collect(
+            quarantine=options['quarantine'],
+            dry_run=options['dry_run'],
+            min_age=options['min_age'],
+            batch_size=options['batch_size'],
+            report=self.report if verbose else None,
+        )
+        action = 'Найдено' if options['dry_run'] else (
+            'Перенесено в карантин' if options['quarantine'] else 'Удалено'
+        )
+        self.stdout.write(f'{action} файлов: {found}, {size} байт')
@@ -0,0 +1,154 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.test import override_settings
+
+from core import loadtest
+from posts import groups
+from posts.models import Follow, Group, Post
+from users import deletion
+
+User = get_user_model()
+
+PREFIX = 'loadtest-'
+PASSWORD = 'loadtest-password'
+GROUP_SLUG = 'loadtest'
+
+
+class Command(BaseCommand):
+    help = (
+        'Поднимает yatube/wsgi.py на локальном порту и нагружает его '
+        'смесью запросов. Создаёт в текущей базе пользователей '
+        f'{PREFIX}*; --cleanup удаляет их после прогона.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument(
+            '--clients', type=int, default=8,
+            help='Число одновременных клиентов.',
+        )
+        parser.add_argument(
+            '--server-threads', type=int, default=8,
+            help='Потоков в каждом процессе сервера.',
+        )
+        parser.add_argument(
+            '--server-processes', type=int, default=1,
+            help='Процессов сервера (больше одного — только в Unix).',
+        )
+        parser.add_argument(
+            '--mix',
+            default=','.join(
+                f'{name}={weight}'
+                for name, weight in loadtest.DEFAULT_MIX.items()
+            ),
+            help='Веса действий: index, follow, comment, create.',
+        )
+        parser.add_argument('--port', type=int, default=0)
+        parser.add_argument('--cleanup', action='store_true')
+
+    def prepare(self, count):
+        """Пользователи нагрузки подписаны друг на друга и имеют посты."""
+        group, _ = Group.objects.get_or_create(
+            slug=GROUP_SLUG,
+            defaults={'title': 'Нагрузка', 'description': 'Нагрузка'},
+        )
+        users = []
+        for number in range(count):
+            user, created = User.objects.get_or_create(
+                username=f'{PREFIX}{number}'
+            )
+            if created:
+                user.set_password(PASSWORD)
+                user.save()
+                Post.objects.bulk_create(
+                    Post(text='Пост для нагрузки', author=user, group=group)
+                    for _ in range(3)
+                )
+            users.append(user)
+        # bulk_create не шлёт сигналов: счётчики группы пересчитываем
+        # явно, а подписки создаём по одной, чтобы они попали в кеш
+        # подписок и в журнал изменений для рекомендаций.
+        groups.recount([group.pk])
+        for user in users:
+            for author in users[:5]:
+                if user != author:
+                    Follow.objects.get_or_create(user=user, author=author)
+        post_ids = list(Post.objects.filter(
+            author__in=users
+        ).values_list('pk', flat=True)[:500])
+        return users, post_ids, [group.pk]
+
+    def cleanup(self):
+        for user_id in User.objects.filter(
+            username__startswith=PREFIX
+        ).values_list('pk', flat=True):
+            User.objects.filter(pk=user_id).update(is_active=False)
+            while not deletion.purge_step(user_id):
+                pass
+        Group.objects.filter(slug=GROUP_SLUG).delete()
+
+    def report(self, rows, elapsed, errors):
+        total = sum(row['requests'] for row in rows)
+        failed = sum(row['errors'] for row in rows)
+        self.stdout.write(
+            f'{"действие":<10}{"запросов":>10}{"ошибок":>8}{"rps":>9}'
+            f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}'
+        )
+        for row in rows:
+            self.stdout.write(
+                f'{row["action"]:<10}{row["requests"]:>10}'
+                f'{row["errors"]:>8}{row["rps"]:>9.1f}'
+                f'{row["p50"]:>10.1f}{row["p95"]:>10.1f}{row["p99"]:>10.1f}'
+            )
+        self.stdout.write(
+            f'Всего: {total} запросов за {elapsed:.1f} с, '
+            f'{total / elapsed:.1f} в секунду, '
+            f'ошибок {failed} ({failed / max(total, 1):.1%})'
+        )
+        self.stdout.write(
+            f'Исключений на сервере: {errors.total.value}, '
+            f'из них блокировок SQLite: {errors.locked.value}'
+        )
+
+    def handle(self, *args, **options):
+        mix = loadtest.parse_mix(options['mix'])
+        unknown = set(mix) - set(loadtest.DEFAULT_MIX)
+        if unknown:
+            raise CommandError(f'Неизвестные действия: {", ".join(unknown)}')
+        users, post_ids, group_ids = self.prepare(options['clients'])
+        from yatube.wsgi import application
+
+        errors = loadtest.ServerErrors()
+        got_request_exception.connect(errors)
+        # Ограничитель частоты и отладочная панель исказили бы замер.
+        with override_settings(RATELIMIT_ENABLED=False, DEBUG=False):
+            server = loadtest.Server(
+                application,
+                port=options['port'],
+                threads=options['server_threads'],
+                processes=options['server_processes'],
+            )
+            server.start()
+            try:
+                clients = [
+                    loadtest.Client(
+                        server.url, user.username, PASSWORD,
+                        post_ids, group_ids,
+                    )
+                    for user in users
+                ]
+                results = loadtest.Results()
+                started = time.monotonic()
+                loadtest.replay(
+                    clients, mix, options['duration'], results
+                )
+                elapsed = time.monotonic() - started
+            finally:
+                server.stop()
+                got_request_exception.disconnect(errors)
+        self.report(results.summary(elapsed), elapsed, errors)
+        if options['cleanup']:
+            self.cleanup()
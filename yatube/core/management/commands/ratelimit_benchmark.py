@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+
+from core.middleware import RateLimitMiddleware
+
+SCOPE = 'posts:add_comment'
+
+
+class Command(BaseCommand):
+    help = 'Измеряет накладные расходы ограничителя частоты на запрос.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def measure(self, handler, requests):
+        started = time.perf_counter()
+        for request in requests:
+            handler(request)
+        return (time.perf_counter() - started) / len(requests) * 1e6
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = RequestFactory()
+        url = reverse(SCOPE, args=(1,))
+        match = resolve(url)
+        requests = []
+        for number in range(iterations):
+            request = factory.post(url, REMOTE_ADDR=f'10.0.{number % 250}.1')
+            request.user = AnonymousUser()
+            request.resolver_match = match
+            requests.append(request)
+        middleware = RateLimitMiddleware(lambda request: HttpResponse())
+
+        def bare(request):
+            return middleware.get_response(request)
+
+        def limited(request):
+            response = middleware.process_view(
+                request, match.func, match.args, match.kwargs
+            )
+            return response or middleware.get_response(request)
+
+        with override_settings(RATELIMITS={SCOPE: f'{iterations}/s'}):
+            bare_time = self.measure(bare, requests)
+            limited_time = self.measure(limited, requests)
+        self.stdout.write(
+            f'Запросов: {iterations}\n'
+            f'Без ограничителя: {bare_time:.2f} мкс/запрос\n'
+            f'С ограничителем: {limited_time:.2f} мкс/запрос\n'
+            f'Накладные расходы: {limited_time - bare_time:.2f} мкс/запрос'
+        )
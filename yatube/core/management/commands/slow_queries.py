@@ -0,0 +1,52 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core import slowlog
+
+ORDERINGS = ('total', 'count', 'p95', 'max')
+
+
+class Command(BaseCommand):
+    help = 'Выводит самые тяжёлые запросы из журнала медленных запросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--sort', choices=ORDERINGS, default='total',
+            help='По какому показателю выбирать запросы.',
+        )
+        parser.add_argument('--log', help='Путь к журналу.')
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Очистить журнал после отчёта.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['log'] or slowlog.log_path()
+        report = sorted(
+            slowlog.aggregate(slowlog.read(path)),
+            key=lambda group: group[options['sort']],
+            reverse=True,
+        )[:options['top']]
+        if not report:
+            self.stdout.write('Медленных запросов нет.')
+        for number, group in enumerate(report, 1):
+            self.stdout.write(
+                f'{number}. {group["fingerprint"]}: '
+                f'{group["count"]} раз, всего {group["total"]:.0f} мс, '
+                f'p50 {group["p50"]:.1f}, p95 {group["p95"]:.1f}, '
+                f'p99 {group["p99"]:.1f}, max {group["max"]:.1f} мс, '
+                f'разных параметров {group["distinct_params"]}'
+            )
+            self.stdout.write(f'   {group["sql"][:300]}')
+            if group['views']:
+                self.stdout.write(
+                    '   Представления: ' + ', '.join(sorted(group['views']))
+                )
+            for template in sorted(group['templates'])[:3]:
+                self.stdout.write(f'   Шаблон: {template}')
+            for frame in group['stack']:
+                self.stdout.write(f'   {frame}')
+        if options['reset'] and os.path.exists(path):
+            os.remove(path)
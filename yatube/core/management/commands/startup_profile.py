@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import startup
+
+PHASE_TITLES = {
+    startup.SETUP: 'django.setup()',
+    startup.FIRST_REQUEST: 'первый запрос',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает, сколько стоит импорт модулей при django.setup() '
+        'и первом запросе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options):
+        try:
+            lines = startup.run(options['path'])
+        except startup.StartupError as error:
+            raise CommandError(f'Процесс замера упал: {error}')
+        phases, imports = startup.parse(lines)
+        for phase, title in PHASE_TITLES.items():
+            if phase not in phases:
+                continue
+            modules = imports[phase]
+            status = phases[phase].get('status')
+            self.stdout.write(
+                f'{title}: {phases[phase]["seconds"] * 1000:.0f} мс, '
+                f'модулей импортировано: {len(modules)}'
+                + (f', ответ {status}' if status else '')
+            )
+            if phases[phase].get('loaded'):
+                self.stdout.write(
+                    '  Загружены заранее: '
+                    + ', '.join(phases[phase]['loaded'])
+                )
+            self.stdout.write('  Пакеты (собственное время):')
+            for package, own in startup.by_package(modules).most_common(
+                options['top']
+            ):
+                self.stdout.write(f'    {own / 1000:8.1f} мс  {package}')
+            self.stdout.write('  Модули (накопленное время):')
+            heaviest = sorted(modules, key=lambda item: item[2], reverse=True)
+            for name, _, cumulative in heaviest[:options['top']]:
+                self.stdout.write(f'    {cumulative / 1000:8.1f} мс  {name}')
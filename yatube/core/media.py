@@ -0,0 +1,150 @@
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models
+
+from .storage import drop_thumbnails
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MIN_AGE = 60 * 60
+
+
+def walk(root, skip=(), prefix=''):
+    """Обходит каталог потоком и выдаёт (имя, DirEntry).
+
+    Имена относительны root и разделены «/», как в полях FileField.
+    Каталоги не сортируются и не читаются целиком: в памяти только
+    открытые итераторы scandir по цепочке вложенных каталогов, так что
+    и плоский каталог с миллионами файлов обходится без роста памяти.
+    """
+    try:
+        iterator = os.scandir(root)
+    except FileNotFoundError:
+        return
+    with iterator:
+        for entry in iterator:
+            name = prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if name not in skip:
+                    yield from walk(entry.path, skip, name + '/')
+            elif entry.is_file(follow_symlinks=False):
+                yield name, entry
+
+
+def file_fields():
+    """Все поля FileField, значения которых ссылаются на MEDIA_ROOT."""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field
+
+
+def referenced(names):
+    """Те из names, на которые ссылается база: запрос на каждое поле."""
+    found = set()
+    for model, field in file_fields():
+        found.update(
+            model._default_manager.filter(
+                **{f'{field.attname}__in': names}
+            ).values_list(field.attname, flat=True)
+        )
+    return found
+
+
+def orphans(root, skip=(), min_age=MIN_AGE, batch_size=BATCH_SIZE):
+    """Файлы из root, на которые нет ссылок в базе.
+
+    Подходящие по возрасту файлы набираются пачками по batch_size
+    и сверяются с базой запросом name__in, поэтому память ограничена
+    размером пачки, а не числом файлов. Файлы моложе min_age секунд
+    пропускаются: это могут быть загрузки, пост для которых ещё не
+    сохранён.
+    """
+    threshold = time.time() - min_age
+    batch = []
+
+    def unreferenced():
+        known = referenced([name for name, _, _ in batch])
+        for item in batch:
+            if item[0] not in known:
+                yield item
+        batch.clear()
+
+    for name, entry in walk(root, skip):
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > threshold:
+            continue
+        batch.append((name, entry.path, stat.st_size))
+        if len(batch) >= batch_size:
+            yield from unreferenced()
+    if batch:
+        yield from unreferenced()
+
+
+def _thumbnail_storages():
+    storages = {id(default_storage): default_storage}
+    for _, field in file_fields():
+        storages.setdefault(id(field.storage), field.storage)
+    return list(storages.values())
+
+
+def _drop_thumbnails(name, storages):
+    for storage in storages:
+        drop_thumbnails(name, storage)
+
+
+def _drop_blobs(names):
+    from .models import StoredBlob
+
+    StoredBlob.objects.filter(name__in=names).delete()
+
+
+def collect(root=None, quarantine=None, dry_run=False, min_age=MIN_AGE,
+            batch_size=BATCH_SIZE, report=None):
+    """Удаляет или переносит в карантин файлы, на которые нет ссылок.
+
+    Миниатюры sorl лежат в отдельном каталоге и удаляются вместе
+    с исходным файлом через хранилище ключей sorl. Возвращает пару
+    (число файлов, суммарный размер в байтах).
+    """
+    from sorl.thumbnail.conf import settings as thumbnail_settings
+
+    root = os.path.abspath(root or settings.MEDIA_ROOT)
+    skip = {thumbnail_settings.THUMBNAIL_PREFIX.strip('/')}
+    if quarantine:
+        quarantine = os.path.abspath(quarantine)
+        inside = os.path.relpath(quarantine, root)
+        if not inside.startswith(os.pardir):
+            skip.add(inside.replace(os.sep, '/'))
+    storages = _thumbnail_storages()
+    found = size = 0
+    batch = []
+
+    for name, path, file_size in orphans(root, skip, min_age, batch_size):
+        found += 1
+        size += file_size
+        if report is not None:
+            report(name, file_size)
+        if dry_run:
+            continue
+        if quarantine:
+            target = os.path.join(quarantine, *name.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        else:
+            os.remove(path)
+        _drop_thumbnails(name, storages)
+        batch.append(name)
+        if len(batch) >= batch_size:
+            _drop_blobs(batch)
+            batch.clear()
+    if batch:
+        _drop_blobs(batch)
+    logger.info('Неиспользуемых файлов: %s, %s байт', found, size)
+    return found, size
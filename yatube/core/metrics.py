@@ -0,0 +1,289 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+from django.conf import settings
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+METRICS = {
+    'yatube_requests_total': (
+        COUNTER, 'Число запросов по представлениям.'
+    ),
+    'yatube_request_duration_seconds': (
+        HISTOGRAM, 'Время ответа по представлениям.'
+    ),
+    'yatube_db_queries_total': (
+        COUNTER, 'Число SQL-запросов по представлениям.'
+    ),
+    'yatube_db_duration_seconds_total': (
+        COUNTER, 'Время SQL-запросов по представлениям.'
+    ),
+    'yatube_cache_lookups_total': (
+        COUNTER, 'Обращения к кешу: попадания и промахи.'
+    ),
+    'yatube_thumbnail_duration_seconds': (
+        HISTOGRAM, 'Время получения миниатюр за запрос.'
+    ),
+}
+# URL-имена этих приложений идут в метки как есть, остальные
+# (админка, отладка) сводятся к одной метке, чтобы не плодить ряды.
+NAMESPACES = ('posts', 'users', 'about')
+OTHER = 'other'
+UNRESOLVED = 'unresolved'
+
+FILE_PATTERN = 'metrics_{pid}.db'
+INITIAL_SIZE = 64 * 1024
+HEADER = struct.Struct('<Q')
+LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+
+
+def _padded(length):
+    return (length + 7) // 8 * 8
+
+
+class ValueFile:
+    """Значения метрик одного процесса в файле, отображённом в память.
+
+    Запись — длина ключа, ключ в UTF-8 с выравниванием до 8 байт и
+    число double. Процесс пишет только в свой файл, поэтому блокировки
+    между процессами не нужны, а читатель просто суммирует все файлы.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < INITIAL_SIZE:
+            self._file.truncate(INITIAL_SIZE)
+            size = INITIAL_SIZE
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self._used = HEADER.unpack_from(self._mmap, 0)[0] or HEADER.size
+        self._positions = {
+            key: position for key, _, position in _entries(self._mmap)
+        }
+
+    def _add_key(self, key):
+        encoded = key.encode()
+        length = _padded(LENGTH.size + len(encoded))
+        needed = self._used + length + VALUE.size
+        if needed > len(self._mmap):
+            self._mmap.resize(max(needed, len(self._mmap) * 2))
+        LENGTH.pack_into(self._mmap, self._used, len(encoded))
+        self._mmap[
+            self._used + LENGTH.size:self._used + LENGTH.size + len(encoded)
+        ] = encoded
+        position = self._used + length
+        VALUE.pack_into(self._mmap, position, 0.0)
+        self._used = needed
+        HEADER.pack_into(self._mmap, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def inc(self, key, amount=1.0):
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._add_key(key)
+            value = VALUE.unpack_from(self._mmap, position)[0]
+            VALUE.pack_into(self._mmap, position, value + amount)
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+def _entries(buffer):
+    used = HEADER.unpack_from(buffer, 0)[0]
+    position = HEADER.size
+    while position < used:
+        length = LENGTH.unpack_from(buffer, position)[0]
+        start = position + LENGTH.size
+        key = bytes(buffer[start:start + length]).decode()
+        position += _padded(LENGTH.size + length)
+        yield key, VALUE.unpack_from(buffer, position)[0], position
+        position += VALUE.size
+
+
+def directory():
+    return getattr(settings, 'METRICS_DIR', None) or os.path.join(
+        tempfile.gettempdir(), 'yatube-metrics'
+    )
+
+
+_values = None
+_values_pid = None
+_values_lock = threading.Lock()
+
+
+def _file():
+    global _values, _values_pid
+    pid = os.getpid()
+    if _values_pid != pid:
+        # После fork у дочернего процесса должен быть свой файл.
+        with _values_lock:
+            if _values_pid != pid:
+                path = directory()
+                os.makedirs(path, exist_ok=True)
+                _values = ValueFile(
+                    os.path.join(path, FILE_PATTERN.format(pid=pid))
+                )
+                _values_pid = pid
+    return _values
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())], ensure_ascii=False)
+
+
+def inc(name, labels, amount=1.0):
+    _file().inc(_key(name, labels), amount)
+
+
+def observe(name, labels, value, buckets=LATENCY_BUCKETS):
+    """Добавляет наблюдение в гистограмму с накопительными корзинами."""
+    values = _file()
+    for bound in buckets:
+        # Пустые корзины тоже заводятся: Prometheus ждёт их все.
+        values.inc(
+            _key(f'{name}_bucket', {**labels, 'le': bound}),
+            1.0 if value <= bound else 0.0,
+        )
+    values.inc(_key(f'{name}_bucket', {**labels, 'le': '+Inf'}))
+    values.inc(_key(f'{name}_sum', labels), value)
+    values.inc(_key(f'{name}_count', labels))
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED
+    if match.namespace in NAMESPACES and match.url_name:
+        return match.view_name
+    return OTHER
+
+
+def record_request(request, response, duration, timings=None):
+    """Записывает метрики одного запроса."""
+    view = view_label(request)
+    inc('yatube_requests_total', {
+        'view': view,
+        'method': request.method,
+        'status': str(response.status_code),
+    })
+    observe('yatube_request_duration_seconds', {'view': view}, duration)
+    if timings is None:
+        return
+    if timings.counts['db']:
+        inc('yatube_db_queries_total', {'view': view}, timings.counts['db'])
+        inc(
+            'yatube_db_duration_seconds_total', {'view': view},
+            timings.durations['db'],
+        )
+    if timings.counts['thumb']:
+        observe(
+            'yatube_thumbnail_duration_seconds', {'view': view},
+            timings.durations['thumb'],
+        )
+    for (kind, hit), count in timings.cache_lookups.items():
+        inc('yatube_cache_lookups_total', {
+            'view': view,
+            'cache': kind,
+            'result': 'hit' if hit else 'miss',
+        }, count)
+
+
+def collect():
+    """Суммирует значения из файлов всех процессов."""
+    totals = {}
+    for path in glob.glob(os.path.join(directory(), FILE_PATTERN.format(
+        pid='*'
+    ))):
+        with open(path, 'rb') as file:
+            buffer = file.read()
+        if len(buffer) < HEADER.size:
+            continue
+        for key, value, _ in _entries(buffer):
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"'),
+        )
+        for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+def _sort_key(item):
+    sample, labels, _ = item
+    # Корзины гистограммы — по возрастанию границы, +Inf последней.
+    others = [pair for pair in labels if pair[0] != 'le']
+    bound = next(
+        (float(value) for name, value in labels if name == 'le'), 0.0
+    )
+    return sample, str(others), bound
+
+
+def _family(sample):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if sample.endswith(suffix):
+            base = sample[:-len(suffix)]
+            if METRICS.get(base, (None,))[0] == HISTOGRAM:
+                return base
+    return sample
+
+
+def render():
+    """Значения всех процессов в текстовом формате Prometheus."""
+    families = {}
+    for key, value in collect().items():
+        sample, labels = json.loads(key)
+        families.setdefault(_family(sample), []).append(
+            (sample, labels, value)
+        )
+    lines = []
+    for family in sorted(families):
+        kind, description = METRICS.get(family, ('untyped', ''))
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} {kind}')
+        for sample, labels, value in sorted(
+            families[family], key=_sort_key
+        ):
+            lines.append(
+                f'{sample}{_format_labels(labels)} {_format_value(value)}'
+            )
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Удаляет накопленные значения всех процессов."""
+    global _values, _values_pid
+    with _values_lock:
+        if _values is not None:
+            _values.close()
+        _values = _values_pid = None
+    for path in glob.glob(os.path.join(directory(), FILE_PATTERN.format(
+        pid='*'
+    ))):
+        os.remove(path)
@@ -0,0 +1,177 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+from http import HTTPStatus
+
+from django.conf import settings
+from django.db import connections
+from django.shortcuts import render
+
+from . import fragments, metrics, profiling, ratelimit, slowlog, timing
+
+timing_logger = logging.getLogger('core.timing')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ServerTimingMiddleware:
+    """Меряет время SQL, шаблонов, кеша и миниатюр в каждом запросе.
+
+    Итоги уходят в заголовок Server-Timing и в строку журнала
+    core.timing в формате JSON. Стоит первым в MIDDLEWARE, чтобы
+    общее время включало остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        timing.install()
+
+    def __call__(self, request):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', True):
+            return self.get_response(request)
+        timings, token = timing.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.query_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            timing.finish(token)
+        values = timings.as_dict()
+        response['Server-Timing'] = timing.header(values)
+        if timing_logger.isEnabledFor(logging.INFO):
+            resolver_match = getattr(request, 'resolver_match', None)
+            timing_logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': resolver_match and resolver_match.view_name,
+                'status': response.status_code,
+                **{key: round(value, 2) for key, value in values.items()},
+            }, ensure_ascii=False))
+        return response
+
+
+class MetricsMiddleware:
+    """Записывает метрики запроса для /metrics/.
+
+    Стоит сразу после ServerTimingMiddleware и берёт у него разбивку
+    времени по фазам.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        metrics.record_request(
+            request,
+            response,
+            time.perf_counter() - started,
+            timing.current(),
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирует отдельный запрос по просьбе сотрудника.
+
+    Стоит после AuthenticationMiddleware: параметр ?profile доступен
+    только сотрудникам. Профиль и SQL запроса сохраняются в
+    PROFILE_DIR и доступны на странице профилей.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = profiling.requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        return profiling.run(request, self.get_response, mode)
+
+
+class FragmentMiddleware:
+    """Подставляет в общую закешированную страницу фрагменты посетителя.
+
+    Стоит после AuthenticationMiddleware. Работает только для
+    представлений с fragments.defer, остальные ответы не трогает.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            fragments.is_deferred(request)
+            and not response.streaming
+            and response.get('Content-Type', '').startswith('text/html')
+        ):
+            response.content = fragments.fill(
+                response.content.decode(response.charset), request
+            )
+        return response
+
+
+class SlowQueryMiddleware:
+    """Пишет запросы дольше SLOW_QUERY_MS в журнал медленных запросов.
+
+    Отчёт по журналу строит команда slow_queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'SLOW_QUERY_LOG_ENABLED', True):
+            return self.get_response(request)
+        logger = slowlog.SlowQueryLogger(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(logger))
+            return self.get_response(request)
+
+
+class RateLimitMiddleware:
+    """Ограничивает частоту запросов к URL из settings.RATELIMITS.
+
+    Учитываются только запросы, меняющие данные: открыть форму или
+    получить её обратно с ошибками можно сколько угодно. Подписка
+    меняет данные и по GET, поэтому такие адреса перечислены
+    в settings.RATELIMIT_ALL_METHODS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(settings, 'RATELIMIT_ENABLED', True):
+            return None
+        scope = request.resolver_match.view_name
+        rate = getattr(settings, 'RATELIMITS', {}).get(scope)
+        if rate is None:
+            return None
+        if request.method in SAFE_METHODS and scope not in getattr(
+            settings, 'RATELIMIT_ALL_METHODS', ()
+        ):
+            return None
+        retry_after = ratelimit.check(request, scope, rate)
+        if not retry_after:
+            return None
+        response = render(
+            request,
+            'core/429.html',
+            {'retry_after': retry_after},
+            status=HTTPStatus.TOO_MANY_REQUESTS,
+        )
+        response['Retry-After'] = str(retry_after)
+        return response
@@ -0,0 +1,23 @@
+from django.db import models
+
+
+class StoredBlob(models.Model):
+    """Уникальный файл в хранилище с адресацией по содержимому."""
+    name = models.CharField(
+        verbose_name='Путь',
+        max_length=255,
+        unique=True
+    )
+    size = models.PositiveIntegerField(verbose_name='Размер', default=0)
+    refs = models.PositiveIntegerField(verbose_name='Ссылок', default=0)
+    created = models.DateTimeField(
+        verbose_name='Сохранён',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,227 @@
+import collections
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from datetime import datetime
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+from . import timing
+
+CPROFILE = 'cprofile'
+SAMPLE = 'sample'
+MODES = (CPROFILE, SAMPLE)
+QUERY_PARAMETER = 'profile'
+HEADER = 'HTTP_X_PROFILE'
+SALT = 'core.profiling'
+TOKEN_MAX_AGE = 24 * 60 * 60
+SAMPLE_INTERVAL = 0.005
+KEEP = 50
+NAME_PATTERN = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9]{6}-[0-9a-f]{4}$')
+EXTENSIONS = {CPROFILE: '.prof', SAMPLE: '.folded'}
+
+
+def directory():
+    return getattr(settings, 'PROFILE_DIR', None) or os.path.join(
+        tempfile.gettempdir(), 'yatube-profiles'
+    )
+
+
+def make_token(mode=CPROFILE):
+    """Подписанное значение заголовка X-Profile."""
+    return signing.dumps({'mode': mode}, salt=SALT)
+
+
+def requested_mode(request):
+    """Режим профилирования, если запрос его просит и имеет на это право.
+
+    Сотрудник включает профилирование параметром ?profile=cprofile
+    (или sample); для запросов без сессии, например из скриптов,
+    подходит заголовок X-Profile с токеном из make_token().
+    """
+    token = request.META.get(HEADER)
+    if token:
+        try:
+            mode = signing.loads(
+                token, salt=SALT, max_age=TOKEN_MAX_AGE
+            ).get('mode')
+        except signing.BadSignature:
+            return None
+        return mode if mode in MODES else None
+    mode = request.GET.get(QUERY_PARAMETER)
+    if mode is None:
+        return None
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_staff:
+        return None
+    return mode if mode in MODES else CPROFILE
+
+
+class Sampler:
+    """Раз в interval секунд снимает стек потока, обслуживающего запрос.
+
+    Результат — свёрнутые стеки в формате flamegraph.pl: строка
+    «функция;функция;... число снимков». Методы повторяют интерфейс
+    cProfile.Profile, чтобы профилировщики были взаимозаменяемы.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f'{code.co_name} '
+                    f'({os.path.basename(code.co_filename)}:{frame.f_lineno})'
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def enable(self):
+        self._thread.start()
+
+    def disable(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def dump_stats(self, path):
+        with open(path, 'w') as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f'{stack} {count}\n')
+
+
+class QueryLog:
+    """Обёртка для connection.execute_wrapper(), запоминающая запросы."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+
+
+def new_name():
+    # Имена сортируются по времени, поэтому ротация удаляет старые.
+    return datetime.now().strftime('%Y%m%d-%H%M%S-%f-') + uuid.uuid4().hex[:4]
+
+
+def save(name, mode, profiler, meta):
+    """Сохраняет профиль и описание запроса, удаляя самые старые."""
+    path = directory()
+    os.makedirs(path, exist_ok=True)
+    base = os.path.join(path, name)
+    profiler.dump_stats(base + EXTENSIONS[mode])
+    with open(base + '.json', 'w') as output:
+        json.dump({'name': name, 'mode': mode, **meta}, output,
+                  ensure_ascii=False)
+    rotate()
+
+
+def rotate(keep=None):
+    keep = keep or getattr(settings, 'PROFILE_KEEP', KEEP)
+    for name in list_names()[keep:]:
+        delete(name)
+
+
+def list_names():
+    """Имена сохранённых профилей, новые первыми."""
+    try:
+        files = os.listdir(directory())
+    except FileNotFoundError:
+        return []
+    names = {
+        file[:-len('.json')] for file in files if file.endswith('.json')
+    }
+    return sorted(
+        (name for name in names if NAME_PATTERN.match(name)), reverse=True
+    )
+
+
+def load_meta(name):
+    with open(os.path.join(directory(), name + '.json')) as source:
+        return json.load(source)
+
+
+def data_path(name, mode):
+    return os.path.join(directory(), name + EXTENSIONS[mode])
+
+
+def summary(name, mode, limit=40):
+    """Текстовая сводка: верх pstats или самые частые стеки."""
+    # pstats и cProfile нужны только профилируемым запросам и
+    # страницам профилей, поэтому не импортируются при старте.
+    import pstats
+
+    path = data_path(name, mode)
+    if mode == SAMPLE:
+        with open(path) as source:
+            return ''.join(source.readlines()[:limit])
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
+
+
+def delete(name):
+    for extension in ('.json', *EXTENSIONS.values()):
+        try:
+            os.remove(os.path.join(directory(), name + extension))
+        except FileNotFoundError:
+            pass
+
+
+def run(request, get_response, mode):
+    """Выполняет запрос под профилировщиком и сохраняет результат."""
+    queries = QueryLog()
+    if mode == CPROFILE:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    else:
+        profiler = Sampler(threading.get_ident())
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(queries))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    timings = timing.current()
+    name = new_name()
+    save(name, mode, profiler, {
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+        'timings': timings.as_dict() if timings is not None else None,
+        'queries': queries.queries,
+    })
+    response['X-Profile-Id'] = name
+    return response
@@ -0,0 +1,67 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+KEY_PREFIX = 'ratelimit'
+
+
+def parse_rate(rate):
+    """Разбирает лимит вида '10/m' в пару (запросов, секунд)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def get_cache():
+    return caches[getattr(settings, 'RATELIMIT_CACHE', 'default')]
+
+
+def consume(key, rate, cache=None):
+    """Забирает один токен из корзины и возвращает паузу до повтора.
+
+    Корзина хранится одним числом — теоретическим временем прихода
+    следующего запроса в миллисекундах (алгоритм GCRA). Значение
+    меняется только атомарными add, incr и decr, так что параллельные
+    процессы не перетирают друг друга. Ключ живёт, пока это время
+    не наступило: истёкший ключ и есть полная корзина, поэтому
+    «наполнять» её записью через set не нужно. 0 означает, что запрос
+    разрешён.
+    """
+    cache = cache or get_cache()
+    limit, period = parse_rate(rate)
+    capacity = period * 1000
+    interval = max(capacity // limit, 1)
+    now = int(time.time() * 1000)
+    for _ in range(2):
+        cache.add(key, now, period)
+        try:
+            arrival = cache.incr(key, interval)
+            break
+        except ValueError:
+            # Ключ вытеснили между add и incr: создаём его заново.
+            continue
+    else:
+        return 0
+    if arrival - now > capacity:
+        cache.decr(key, interval)
+        return (arrival - now - capacity) / 1000
+    # Срок ключа — до момента, когда корзина снова наполнится.
+    cache.touch(key, max(math.ceil((arrival - now) / 1000), 1))
+    return 0
+
+
+def client_key(request, scope):
+    """Корзина пользователя, а для анонимов — корзина IP-адреса."""
+    if request.user.is_authenticated:
+        ident = f'user:{request.user.pk}'
+    else:
+        ident = f'ip:{request.META.get("REMOTE_ADDR", "")}'
+    return f'{KEY_PREFIX}:{scope}:{ident}'
+
+
+def check(request, scope, rate):
+    """Возвращает целое число секунд до повтора или 0."""
+    delay = consume(client_key(request, scope), rate)
+    return math.ceil(delay) if delay else 0
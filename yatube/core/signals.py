@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import fragments
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, raw, update_fields=None, **kwargs):
+    # В шапке выводится имя пользователя; вход в систему меняет только
+    # last_login и фрагменты не трогает.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    fragments.invalidate(instance.pk)
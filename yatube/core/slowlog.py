@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.template.base import Node
+
+THRESHOLD_MS = 100
+STACK_DEPTH = 6
+
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+
+
+def log_path():
+    return getattr(settings, 'SLOW_QUERY_LOG', None) or os.path.join(
+        tempfile.gettempdir(), 'yatube-slow-queries.jsonl'
+    )
+
+
+def threshold():
+    return getattr(settings, 'SLOW_QUERY_MS', THRESHOLD_MS)
+
+
+def normalize(sql):
+    """Приводит SQL к виду, одинаковому для запросов одной формы.
+
+    Литералы заменяются на «?», а списки IN любой длины сводятся
+    к одному элементу: pk__in с 3 и с 300 значениями — один запрос.
+    """
+    sql = _IN_LIST.sub('(%s, ...)', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(text):
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+# Кадры самих обёрток ничего не говорят о причине запроса.
+_WRAPPER_MODULES = tuple(
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ('slowlog.py', 'timing.py', 'profiling.py', 'middleware.py')
+)
+
+
+def _project_frame(filename):
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and 'site-packages' not in filename
+        and not filename.startswith(_WRAPPER_MODULES)
+    )
+
+
+def attribution(frame):
+    """Урезанный стек кода проекта и узел шаблона, вызвавший запрос.
+
+    Узел ищется по локальной переменной self у кадров Node.render;
+    ближайший к запросу узел самый точный: для {{ author.posts.count }}
+    это сама переменная, а не цикл вокруг неё.
+    """
+    stack = []
+    node = None
+    while frame is not None:
+        if node is None:
+            candidate = frame.f_locals.get('self')
+            token = getattr(candidate, 'token', None)
+            if isinstance(candidate, Node) and token is not None:
+                origin = getattr(candidate, 'origin', None)
+                node = '{}:{} {}'.format(
+                    getattr(origin, 'template_name', None) or '?',
+                    token.lineno,
+                    token.contents[:80],
+                )
+        code = frame.f_code
+        if len(stack) < STACK_DEPTH and _project_frame(code.co_filename):
+            stack.append('{}:{} in {}'.format(
+                os.path.relpath(code.co_filename, settings.BASE_DIR),
+                frame.f_lineno,
+                code.co_name,
+            ))
+        frame = frame.f_back
+    return stack, node
+
+
+def write(entry):
+    line = json.dumps(entry, ensure_ascii=False) + '\n'
+    # Строки короче PIPE_BUF дописываются в режиме O_APPEND целиком,
+    # поэтому несколько процессов могут вести один журнал.
+    with open(log_path(), 'a') as log:
+        log.write(line)
+
+
+class SlowQueryLogger:
+    """Обёртка для connection.execute_wrapper(), пишущая медленные запросы."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.threshold = threshold()
+
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match is not None else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            if duration >= self.threshold:
+                self.log(sql, params, duration)
+
+    def log(self, sql, params, duration):
+        normalized = normalize(sql)
+        stack, node = attribution(sys._getframe(1))
+        write({
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'fingerprint': fingerprint(normalized),
+            'sql': normalized,
+            'params': fingerprint(repr(params)),
+            'ms': round(duration, 3),
+            'view': self.view_name(),
+            'template': node,
+            'stack': stack,
+        })
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку, ближайший ранг."""
+    index = max(0, min(len(values) - 1, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+def read(path=None):
+    try:
+        with open(path or log_path()) as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def aggregate(entries):
+    """Сводка по отпечаткам: число, перцентили, где встречается."""
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'],
+            'sql': entry['sql'],
+            'durations': [],
+            'params': set(),
+            'views': set(),
+            'templates': set(),
+            'stack': entry['stack'],
+        })
+        group['durations'].append(entry['ms'])
+        group['params'].add(entry['params'])
+        if entry['view']:
+            group['views'].add(entry['view'])
+        if entry['template']:
+            group['templates'].add(entry['template'])
+    report = []
+    for group in groups.values():
+        durations = sorted(group.pop('durations'))
+        group.update({
+            'count': len(durations),
+            'total': sum(durations),
+            'p50': percentile(durations, 0.5),
+            'p95': percentile(durations, 0.95),
+            'p99': percentile(durations, 0.99),
+            'max': durations[-1],
+            'distinct_params': len(group.pop('params')),
+        })
+        report.append(group)
+    return report
@@ -0,0 +1,123 @@
+import collections
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+SETUP = 'setup'
+FIRST_REQUEST = 'first_request'
+MARKER = 'yatube-startup:'
+# Модули, которые не нужны до первого обращения к картинкам или
+# отладке; после django.setup() их быть не должно.
+LAZY_MODULES = ('PIL', 'debug_toolbar', 'requests')
+# Бюджет django.setup() в секундах с запасом на медленные машины CI;
+# сейчас старт занимает около 0,3 с.
+SETUP_BUDGET = 2.0
+
+SCRIPT = '''
+import json
+import sys
+import time
+
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - started
+print({marker!r}, json.dumps({{
+    'phase': 'setup',
+    'seconds': setup,
+    'loaded': [name for name in {lazy!r} if name in sys.modules],
+}}), file=sys.stderr, flush=True)
+if {path!r}:
+    import io
+    from django.core.handlers.wsgi import WSGIHandler
+    started = time.perf_counter()
+    # Обработчик, а не тестовый клиент: ошибка представления станет
+    # ответом 500, как на сервере, а django.test не попадёт в замер.
+    status = []
+    WSGIHandler()({{
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': {path!r},
+        'QUERY_STRING': '',
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.url_scheme': 'http',
+    }}, lambda code, headers: status.append(int(code.split()[0])))
+    print({marker!r}, json.dumps({{
+        'phase': 'first_request',
+        'seconds': time.perf_counter() - started,
+        'status': status[0],
+    }}), file=sys.stderr, flush=True)
+'''
+
+
+class StartupError(Exception):
+    pass
+
+
+def run(path='/', importtime=True, env=None):
+    """Запускает django.setup() и первый запрос в отдельном процессе.
+
+    Возвращает вывод stderr: строки -X importtime и строки-маркеры
+    с длительностью фаз.
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', SCRIPT.format(
+        marker=MARKER, lazy=LAZY_MODULES, path=path
+    )]
+    environment = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+        **(env or {}),
+    }
+    result = subprocess.run(
+        command,
+        cwd=settings.BASE_DIR,
+        env=environment,
+        stderr=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        universal_newlines=True,
+    )
+    if result.returncode:
+        raise StartupError(result.stderr.strip().splitlines()[-1])
+    return result.stderr.splitlines()
+
+
+def parse(lines):
+    """Разбирает вывод run() по фазам.
+
+    Возвращает (фазы, импорты): фазы — словарь маркеров, импорты —
+    словарь фаза → список (модуль, собственное время, накопленное
+    время) в микросекундах. Импорт относится к фазе, маркер которой
+    идёт после него.
+    """
+    phases = {}
+    imports = collections.defaultdict(list)
+    pending = []
+    for line in lines:
+        if line.startswith(MARKER):
+            phase = json.loads(line[len(MARKER):])
+            phases[phase['phase']] = phase
+            imports[phase['phase']].extend(pending)
+            pending = []
+            continue
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        pending.append((name.strip(), int(own), int(cumulative)))
+    return phases, imports
+
+
+def by_package(imports):
+    """Собственное время импорта, сложенное по пакетам верхнего уровня."""
+    totals = collections.Counter()
+    for name, own, _ in imports:
+        totals[name.split('.')[0]] += own
+    return totals
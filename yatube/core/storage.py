@@ -0,0 +1,174 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.fields.files import ImageFieldFile
+from django.utils.deconstruct import deconstructible
+
+HASH_NAME = 'sha256'
+PARTIAL_SUFFIX = '.part'
+
+
+def blob_name(directory, digest, extension):
+    """Путь блоба: каталог поля, два уровня по префиксу хеша."""
+    return os.path.join(
+        directory, digest[:2], digest[2:4], digest + extension.lower()
+    ).replace('\\', '/')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит каждый уникальный файл один раз под его хешем.
+
+    Хеш считается во время потоковой записи во временный файл, после
+    чего файл атомарно переносится на место блоба или отбрасывается,
+    если такой блоб уже есть. Число постов, ссылающихся на блоб,
+    хранится в StoredBlob: delete() уменьшает счётчик и удаляет файл
+    только вместе с последней ссылкой. Одинаковые картинки получают
+    одинаковое имя, поэтому и миниатюры для них строятся один раз.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя блоба определяется содержимым, а не исходным именем.
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1]
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+        digest = hashlib.new(HASH_NAME)
+        size = 0
+        descriptor, partial = tempfile.mkstemp(
+            dir=full_directory, suffix=PARTIAL_SUFFIX
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as destination:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    destination.write(chunk)
+                    size += len(chunk)
+            name = blob_name(directory, digest.hexdigest(), extension)
+            self._acquire(name, size, partial)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        return name
+
+    def _acquire(self, name, size, partial):
+        """Добавляет ссылку на блоб и при необходимости кладёт файл.
+
+        Файл переносится под той же блокировкой записи, что и счётчик,
+        поэтому параллельный delete() не может удалить его между
+        проверкой и увеличением счётчика.
+        """
+        from .models import StoredBlob
+
+        with transaction.atomic():
+            updated = StoredBlob.objects.filter(name=name).update(
+                refs=F('refs') + 1
+            )
+            if not updated:
+                try:
+                    with transaction.atomic():
+                        StoredBlob.objects.create(
+                            name=name, size=size, refs=1
+                        )
+                except IntegrityError:
+                    StoredBlob.objects.filter(name=name).update(
+                        refs=F('refs') + 1
+                    )
+            path = self.path(name)
+            if os.path.exists(path):
+                # Блоб снова нужен: обновляем mtime, чтобы сборщик
+                # не счёл старый файл брошенным, пока пост не сохранён.
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(partial, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+
+    def delete(self, name):
+        """Снимает одну ссылку; файл удаляется вместе с последней.
+
+        Вместе с файлом удаляются его миниатюры и записи о них
+        в хранилище ключей sorl.
+
+        Файлы, сохранённые до появления учёта ссылок, здесь не
+        трогаются: на них может ссылаться несколько постов, и их
+        убирает сборщик неиспользуемых файлов.
+        """
+        from .models import StoredBlob
+
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        with transaction.atomic():
+            released, _ = StoredBlob.objects.filter(
+                name=name, refs__lte=1
+            ).delete()
+            if released:
+                super().delete(name)
+                drop_thumbnails(name, self)
+            else:
+                StoredBlob.objects.filter(name=name).update(
+                    refs=F('refs') - 1
+                )
+
+
+def drop_thumbnails(name, storage):
+    """Удаляет миниатюры файла и записи sorl о нём, не трогая сам файл."""
+    from sorl.thumbnail import default
+    from sorl.thumbnail.images import ImageFile
+
+    default.kvstore.delete(ImageFile(name, storage))
+
+
+content_storage = ContentAddressedStorage()
+
+
+def acquired(instance, field_name):
+    """Взял ли объект новую ссылку на файл поля с прошлого сохранения."""
+    return field_name in instance.__dict__.get('_acquired_files', ())
+
+
+def forget_acquired(instance, field_name):
+    instance.__dict__.get('_acquired_files', set()).discard(field_name)
+
+
+class ReferencedImageFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        # Одинаковое содержимое получает то же имя, поэтому по имени
+        # не понять, что ссылку взяли заново: отмечаем это явно.
+        super().save(name, content, save=False)
+        self.instance.__dict__.setdefault('_acquired_files', set()).add(
+            self.field.name
+        )
+        if save:
+            self.instance.save()
+
+
+def track_references(field):
+    """Отмечает на объекте каждое сохранение файла в поле.
+
+    Поле остаётся обычным ImageField, меняется только класс значения.
+    """
+    field.attr_class = ReferencedImageFieldFile
+    return field
+
+
+def release_on_commit(names, storage=content_storage):
+    """Снимает ссылки на файлы после фиксации текущей транзакции."""
+    names = [name for name in names if name]
+
+    def release():
+        for name in names:
+            storage.delete(name)
+
+    if names:
+        transaction.on_commit(release)
@@ -0,0 +1,20 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import fragments
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def fragment(context, name):
+    """Подключает шаблон, зависящий от посетителя.
+
+    В обычном режиме это {% include %}; на страницах с отложенными
+    фрагментами выводится заглушка для FragmentMiddleware.
+    """
+    request = context.get('request')
+    if request is not None and fragments.is_deferred(request):
+        return mark_safe(fragments.placeholder(name))
+    with context.push():
+        return context.template.engine.get_template(name).render(context)
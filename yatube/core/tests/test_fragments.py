@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import fragments
+
+User = get_user_model()
+
+
+class FragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.alice = User.objects.create_user(username='alice')
+        cls.bob = User.objects.create_user(username='bob')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:index')
+
+    def client_for(self, user=None):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def test_cached_page_gets_header_of_each_visitor(self):
+        response = self.client_for(self.alice).get(self.url)
+        self.assertContains(response, 'Пользователь: alice')
+        self.assertContains(response, 'Избранные авторы')
+        # Новый пост не виден: страница ниже берётся из кеша.
+        Post.objects.create(text='После кеширования', author=self.alice)
+        response = self.client_for(self.bob).get(self.url)
+        self.assertContains(response, 'Пользователь: bob')
+        self.assertNotContains(response, 'После кеширования')
+        response = self.client_for().get(self.url)
+        self.assertNotContains(response, 'alice')
+        self.assertNotContains(response, 'Избранные авторы')
+        self.assertContains(response, 'Войти')
+        self.assertNotContains(response, '<!--fragment:')
+
+    @override_settings(SHARED_CACHE=True)
+    def test_rename_invalidates_fragment(self):
+        user = User.objects.create_user(username='before')
+        client = self.client_for(user)
+        client.get(self.url)
+        user.username = 'after'
+        user.save()
+        self.assertContains(client.get(self.url), 'Пользователь: after')
+
+    def test_pages_without_defer_render_header_inline(self):
+        response = self.client_for(self.alice).get(
+            reverse('posts:follow_index')
+        )
+        self.assertContains(response, 'Пользователь: alice')
+        self.assertFalse(fragments.is_deferred(response.wsgi_request))
+
+    def test_post_text_is_not_treated_as_placeholder(self):
+        text = fragments.placeholder('includes/header.html')
+        Post.objects.create(text=text, author=self.alice)
+        response = self.client_for().get(self.url)
+        self.assertContains(response, 'Войти', count=1)
+        self.assertContains(response, '&lt;!--fragment:')
+
+    def test_fragments_are_not_cached_without_shared_cache(self):
+        """Без общего кеша сброс версии в другом процессе не виден,
+        поэтому фрагмент рисуется заново на каждый запрос."""
+        user = User.objects.create_user(username='before')
+        client = self.client_for(user)
+        client.get(self.url)
+        User.objects.filter(pk=user.pk).update(username='after')
+        self.assertContains(client.get(self.url), 'Пользователь: after')
@@ -0,0 +1,49 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from posts.models import Comment, FollowGraphChange, Group, Post
+
+from .. import loadtest
+from ..management.commands.loadtest import Command
+
+User = get_user_model()
+
+
+class LoadTestCommandTests(TransactionTestCase):
+    def test_parse_mix(self):
+        self.assertEqual(
+            loadtest.parse_mix('index=5, create=1'),
+            {'index': 5, 'create': 1},
+        )
+
+    def test_short_run_reports_every_action(self):
+        out = StringIO()
+        call_command(
+            'loadtest', '--duration=1', '--clients=2',
+            '--mix=index=1,follow=1,comment=1,create=1', stdout=out,
+        )
+        report = out.getvalue()
+        for action in ('index', 'follow', 'comment', 'create'):
+            self.assertIn(action, report)
+        self.assertIn('блокировок SQLite', report)
+        self.assertTrue(Comment.objects.exists())
+        call_command('loadtest', '--duration=0', '--cleanup', stdout=out)
+        self.assertFalse(Group.objects.filter(slug='loadtest').exists())
+        self.assertFalse(
+            User.objects.filter(username__startswith='loadtest-').exists()
+        )
+
+    def test_seeding_keeps_counters_and_follow_log(self):
+        """Подготовка нагрузки не обходит счётчики группы и журнал
+        подписок."""
+        _, _, (group_id,) = Command().prepare(3)
+        group = Group.objects.get(pk=group_id)
+        self.assertEqual(group.posts_count, 9)
+        self.assertEqual(
+            group.last_post_at,
+            Post.objects.latest('pub_date').pub_date,
+        )
+        self.assertEqual(FollowGraphChange.objects.count(), 6)
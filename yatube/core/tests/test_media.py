@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import Post
+
+from .. import media
+from ..models import StoredBlob
+from ..storage import content_storage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGarbageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        os.makedirs(TEMP_MEDIA_ROOT)
+
+    def touch(self, name, content=b'data'):
+        path = os.path.join(TEMP_MEDIA_ROOT, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+        return path
+
+    def test_flat_directory_is_checked_in_batches(self):
+        """Плоский каталог сверяется с базой пачками: число запросов
+        растёт с числом пачек, а не файлов, и ни один файл не теряется."""
+        for i in range(1200):
+            self.touch(f'posts/{i}.gif', b'')
+        Post.objects.create(
+            text='Пост', author=self.user, image='posts/7.gif'
+        )
+        fields = len(list(media.file_fields()))
+        with self.assertNumQueries(12 * fields):
+            names = {
+                name for name, _, _ in media.orphans(
+                    TEMP_MEDIA_ROOT, min_age=0, batch_size=100
+                )
+            }
+        self.assertEqual(len(names), 1199)
+        self.assertNotIn('posts/7.gif', names)
+
+    def test_only_unreferenced_files_are_collected(self):
+        kept = content_storage.save('posts/kept.gif', ContentFile(b'kept'))
+        Post.objects.create(text='Пост', author=self.user, image=kept)
+        orphan = content_storage.save(
+            'posts/orphan.gif', ContentFile(b'orphan')
+        )
+        legacy = self.touch('posts/legacy.gif')
+        thumbnail = self.touch('cache/aa/bb/thumbnail.jpg')
+        with mock.patch.object(media, '_drop_thumbnails') as drop:
+            found, _ = media.collect(min_age=0)
+        self.assertEqual(found, 2)
+        self.assertTrue(content_storage.exists(kept))
+        self.assertFalse(content_storage.exists(orphan))
+        self.assertFalse(os.path.exists(legacy))
+        self.assertTrue(os.path.exists(thumbnail))
+        self.assertFalse(StoredBlob.objects.filter(name=orphan).exists())
+        dropped = sorted(call.args[0] for call in drop.call_args_list)
+        self.assertEqual(dropped, sorted([orphan, 'posts/legacy.gif']))
+
+    def test_dry_run_keeps_files(self):
+        path = self.touch('posts/orphan.gif')
+        out = StringIO()
+        call_command(
+            'collect_media_garbage', '--dry-run', '--min-age=0', stdout=out
+        )
+        self.assertTrue(os.path.exists(path))
+        self.assertIn('posts/orphan.gif', out.getvalue())
+        self.assertIn('Найдено файлов: 1', out.getvalue())
+
+    def test_quarantine_moves_files(self):
+        self.touch('posts/orphan.gif')
+        quarantine = os.path.join(TEMP_MEDIA_ROOT, 'quarantine')
+        media.collect(quarantine=quarantine, min_age=0)
+        self.assertTrue(
+            os.path.exists(os.path.join(quarantine, 'posts', 'orphan.gif'))
+        )
+        self.assertEqual(media.collect(quarantine=quarantine, min_age=0)[0], 0)
+
+    def test_recent_files_are_kept(self):
+        path = self.touch('posts/uploading.gif')
+        self.assertEqual(media.collect()[0], 0)
+        self.assertTrue(os.path.exists(path))
@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import metrics
+
+TEMP_METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+class MetricsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        metrics.reset()
+        cache.clear()
+
+    def tearDown(self):
+        metrics.reset()
+
+    def test_values_survive_reopening(self):
+        """Значения читаются из файла, а не из памяти процесса."""
+        metrics.inc('yatube_requests_total', {'view': 'posts:index'}, 2)
+        for number in range(2000):
+            metrics.inc('yatube_requests_total', {'view': f'v{number}'})
+        totals = metrics.collect()
+        key = metrics._key('yatube_requests_total', {'view': 'posts:index'})
+        self.assertEqual(totals[key], 2)
+        self.assertEqual(len(totals), 2001)
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics.observe('yatube_request_duration_seconds', {'view': 'x'}, 0.3)
+        text = metrics.render()
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket{le="0.25",view="x"} 0',
+            text,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket{le="0.5",view="x"} 1',
+            text,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket{le="+Inf",view="x"} 1',
+            text,
+        )
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram', text)
+
+    def test_requests_are_recorded_by_url_name(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:author'))
+        text = self.client.get(reverse('core:metrics')).content.decode()
+        self.assertIn(
+            'yatube_requests_total{method="GET",status="200",'
+            'view="posts:index"} 2',
+            text,
+        )
+        self.assertIn('view="about:author"', text)
+        self.assertIn(
+            'yatube_cache_lookups_total{cache="page:index_page",'
+            'result="hit",view="posts:index"} 1',
+            text,
+        )
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', text)
+
+    @override_settings(INTERNAL_IPS=[])
+    def test_endpoint_is_hidden_from_public(self):
+        url = reverse('core:metrics')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(
+            User.objects.create_user(username='admin', is_staff=True)
+        )
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import profiling
+
+TEMP_PROFILE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+
+@override_settings(PROFILE_DIR=TEMP_PROFILE_DIR, PROFILE_KEEP=2)
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='admin', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_PROFILE_DIR, ignore_errors=True)
+        cache.clear()
+        self.url = reverse('posts:profile', args=('user',))
+
+    def test_staff_query_parameter_saves_profile(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {'profile': 'cprofile'})
+        name = response['X-Profile-Id']
+        self.assertEqual(profiling.list_names(), [name])
+        meta = profiling.load_meta(name)
+        self.assertEqual(meta['status'], 200)
+        self.assertTrue(meta['queries'])
+        self.assertGreater(meta['timings']['db_count'], 0)
+        detail = self.client.get(
+            reverse('core:profile_detail', args=(name,))
+        )
+        self.assertContains(detail, 'cumulative')
+        download = self.client.get(
+            reverse('core:profile_detail', args=(name,)), {'download': 1}
+        )
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attachment', download['Content-Disposition'])
+
+    def test_parameter_ignored_for_regular_users(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {'profile': 'cprofile'})
+        self.assertFalse(response.has_header('X-Profile-Id'))
+        self.assertEqual(profiling.list_names(), [])
+
+    def test_signed_header_enables_sampling(self):
+        response = self.client.get(
+            self.url, HTTP_X_PROFILE=profiling.make_token(profiling.SAMPLE)
+        )
+        meta = profiling.load_meta(response['X-Profile-Id'])
+        self.assertEqual(meta['mode'], profiling.SAMPLE)
+        forged = self.client.get(self.url, HTTP_X_PROFILE='forged')
+        self.assertFalse(forged.has_header('X-Profile-Id'))
+
+    def test_directory_is_rotated(self):
+        self.client.force_login(self.staff)
+        for _ in range(3):
+            self.client.get(self.url, {'profile': 'cprofile'})
+        self.assertEqual(len(profiling.list_names()), 2)
+
+    def test_profiles_are_staff_only(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('core:profile_list'))
+        self.assertEqual(response.status_code, 302)
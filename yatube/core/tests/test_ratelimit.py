@@ -0,0 +1,117 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..checks import check_ratelimit_cache
+from ..ratelimit import consume
+
+User = get_user_model()
+
+
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_allows_burst_then_blocks(self):
+        """Корзина пропускает limit запросов подряд, затем отказывает."""
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            for _ in range(3):
+                self.assertEqual(consume('bucket', '3/m'), 0)
+            self.assertAlmostEqual(consume('bucket', '3/m'), 20.0)
+
+    def test_bucket_refills_over_time(self):
+        """Токены восстанавливаются равномерно."""
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            for _ in range(3):
+                consume('bucket', '3/m')
+        with mock.patch('core.ratelimit.time.time', return_value=1020.0):
+            self.assertEqual(consume('bucket', '3/m'), 0)
+            self.assertGreater(consume('bucket', '3/m'), 0)
+
+    def test_drained_bucket_is_not_reset_by_late_requests(self):
+        """Отказы не наполняют корзину заново."""
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            for _ in range(3):
+                consume('bucket', '3/m')
+            for _ in range(5):
+                self.assertGreater(consume('bucket', '3/m'), 0)
+
+    def test_bucket_key_expires_when_full(self):
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            consume('bucket', '3/m')
+        with mock.patch('core.ratelimit.time.time', return_value=1021.0):
+            self.assertIsNone(cache.get('bucket'))
+
+    @override_settings(SHARED_CACHE=False, RATELIMIT_CACHE='default')
+    def test_per_process_cache_is_reported(self):
+        self.assertEqual(
+            [error.id for error in check_ratelimit_cache(None)], ['core.W001']
+        )
+
+
+@override_settings(RATELIMITS={
+    'posts:add_comment': '2/m',
+    'posts:profile_follow': '2/m',
+    'users:signup': '2/m',
+})
+class RateLimitMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='spammer')
+        cls.other = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Текст поста', author=cls.user)
+        cls.comment_url = reverse('posts:add_comment', args=(cls.post.id,))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_too_many_requests(self):
+        """Лишний запрос получает 429 и заголовок Retry-After."""
+        for _ in range(2):
+            response = self.client.post(self.comment_url, {'text': 'спам'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.client.post(self.comment_url, {'text': 'спам'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_buckets_are_per_user(self):
+        """Лимит одного пользователя не мешает другому."""
+        for _ in range(3):
+            self.client.post(self.comment_url, {'text': 'спам'})
+        other_client = Client()
+        other_client.force_login(self.other)
+        response = other_client.post(self.comment_url, {'text': 'привет'})
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_unlisted_urls_are_not_limited(self):
+        for _ in range(5):
+            response = self.client.get(reverse('posts:index'))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_form_views_are_not_limited(self):
+        """Открыть форму регистрации можно сколько угодно раз."""
+        self.client.logout()
+        for _ in range(5):
+            response = self.client.get(reverse('users:signup'))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+        for _ in range(2):
+            self.client.post(reverse('users:signup'), {})
+        response = self.client.post(reverse('users:signup'), {})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    def test_state_changing_get_is_limited(self):
+        url = reverse('posts:profile_follow', args=(self.other.username,))
+        for _ in range(2):
+            self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import slowlog
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+LOG = os.path.join(TEMP_DIR, 'slow.jsonl')
+User = get_user_model()
+
+
+@override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_LOG=LOG)
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост', author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        if os.path.exists(LOG):
+            os.remove(LOG)
+
+    def test_normalize_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            slowlog.normalize(
+                'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s, %s, %s)\n'
+                "  AND \"a\".\"name\" = 'x' LIMIT 21"
+            ),
+            'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s, ...) '
+            'AND "a"."name" = ? LIMIT ?',
+        )
+
+    def test_template_node_is_attributed(self):
+        self.client.get(reverse('posts:profile', args=('author',)))
+        entries = list(slowlog.read())
+        self.assertTrue(entries)
+        self.assertEqual(
+            {entry['view'] for entry in entries}, {'posts:profile'}
+        )
+        templates = {entry['template'] for entry in entries}
+        self.assertIn('posts/profile.html:8 author.posts.count', templates)
+        stacks = [frame for entry in entries for frame in entry['stack']]
+        self.assertTrue(any('posts/views.py' in frame for frame in stacks))
+
+    def count_group(self):
+        groups = [
+            group for group in slowlog.aggregate(slowlog.read())
+            if 'posts/profile.html:8 author.posts.count' in group['templates']
+        ]
+        self.assertEqual(len(groups), 1)
+        return groups[0]
+
+    def test_report_aggregates_by_fingerprint(self):
+        url = reverse('posts:profile', args=('author',))
+        self.client.get(url)
+        once = self.count_group()['count']
+        self.client.get(url)
+        group = self.count_group()
+        self.assertEqual(group['count'], 2 * once)
+        self.assertEqual(group['distinct_params'], 1)
+        out = StringIO()
+        call_command('slow_queries', '--top=1', '--reset', stdout=out)
+        self.assertIn('Представления: posts:profile', out.getvalue())
+        self.assertFalse(os.path.exists(LOG))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(slowlog.percentile(values, 0.5), 50)
+        self.assertEqual(slowlog.percentile(values, 0.95), 95)
+        self.assertEqual(slowlog.percentile([7], 0.99), 7)
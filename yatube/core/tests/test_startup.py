@@ -0,0 +1,49 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from .. import startup
+
+IMPORTTIME = [
+    'import time: self [us] | cumulative | imported package',
+    'import time:       120 |        120 |   django.utils.version',
+    'import time:        80 |        200 | django',
+    startup.MARKER + ' {"phase": "setup", "seconds": 0.3, "loaded": []}',
+    'import time:        50 |         50 | posts.views',
+    'import time:        10 |         60 | posts',
+    startup.MARKER
+    + ' {"phase": "first_request", "seconds": 0.05, "status": 200}',
+]
+
+
+class StartupTests(SimpleTestCase):
+    def test_setup_fits_budget_without_optional_modules(self):
+        phases, _ = startup.parse(startup.run(
+            path='', importtime=False, env={'YATUBE_DEBUG': 'False'}
+        ))
+        self.assertEqual(phases['setup']['loaded'], [])
+        self.assertLess(phases['setup']['seconds'], startup.SETUP_BUDGET)
+
+    def test_parse_splits_imports_by_phase(self):
+        phases, imports = startup.parse(IMPORTTIME)
+        self.assertEqual(phases['first_request']['status'], 200)
+        self.assertEqual(
+            imports['setup'],
+            [('django.utils.version', 120, 120), ('django', 80, 200)],
+        )
+        self.assertEqual(startup.by_package(imports['setup']), {'django': 200})
+        self.assertEqual(startup.by_package(imports['first_request']), {
+            'posts': 60,
+        })
+
+    def test_command_reports_heaviest_packages(self):
+        out = StringIO()
+        with mock.patch.object(startup, 'run', return_value=IMPORTTIME):
+            call_command('startup_profile', top=1, stdout=out)
+        report = out.getvalue()
+        self.assertIn('django.setup(): 300 мс', report)
+        self.assertIn('0.2 мс  django\n', report)
+        self.assertIn('первый запрос: 50 мс', report)
+        self.assertNotIn('django.utils.version', report)
@@ -0,0 +1,171 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from posts.models import Post
+
+from ..models import StoredBlob
+from ..storage import (
+    ContentAddressedStorage, content_storage, release_on_commit
+)
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.storage = ContentAddressedStorage()
+
+    def save(self, name, content=b'picture'):
+        return self.storage.save(name, ContentFile(content))
+
+    def test_same_content_is_stored_once(self):
+        first = self.save('posts/cat.JPG')
+        second = self.save('posts/repost.jpg')
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith('posts/'))
+        self.assertTrue(first.endswith('.jpg'))
+        self.assertEqual(StoredBlob.objects.get(name=first).refs, 2)
+        directory = os.path.dirname(self.storage.path(first))
+        self.assertEqual(os.listdir(directory), [os.path.basename(first)])
+
+    def test_different_content_gets_different_names(self):
+        self.assertNotEqual(
+            self.save('posts/a.gif', b'one'),
+            self.save('posts/a.gif', b'two'),
+        )
+
+    def test_file_removed_with_last_reference(self):
+        name = self.save('posts/cat.jpg')
+        self.save('posts/cat.jpg')
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredBlob.objects.get(name=name).refs, 1)
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredBlob.objects.filter(name=name).exists())
+
+    def test_thumbnails_removed_with_last_reference(self):
+        """Миниатюры не переживают исходный файл."""
+        from sorl.thumbnail import default
+        from sorl.thumbnail.images import ImageFile
+
+        name = self.save('posts/cat.gif', SMALL_GIF)
+        source = ImageFile(name, self.storage)
+        thumbnail = ImageFile('cache/aa/bb/cat.gif', default.storage)
+        thumbnail.write(SMALL_GIF)
+        default.kvstore.get_or_set(source)
+        default.kvstore.set(thumbnail, source)
+        self.storage.delete(name)
+        self.assertFalse(thumbnail.exists())
+        self.assertIsNone(default.kvstore.get(source))
+
+    def test_reused_blob_is_touched(self):
+        """Повторная загрузка защищает старый блоб от сборщика."""
+        name = self.save('posts/cat.jpg')
+        path = self.storage.path(name)
+        os.utime(path, (0, 0))
+        self.save('posts/again.jpg')
+        self.assertGreater(os.path.getmtime(path), 0)
+
+    def test_untracked_file_is_kept(self):
+        """Файлы, загруженные до учёта ссылок, оставляются сборщику."""
+        path = self.storage.path('posts/old.gif')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as legacy:
+            legacy.write(b'legacy')
+        self.storage.delete('posts/old.gif')
+        self.assertTrue(os.path.exists(path))
+
+    def test_release_waits_for_commit(self):
+        name = self.save('posts/cat.jpg')
+        with mock.patch('core.storage.transaction.on_commit') as on_commit:
+            release_on_commit([name, ''], storage=self.storage)
+        self.assertTrue(self.storage.exists(name))
+        on_commit.call_args[0][0]()
+        self.assertFalse(self.storage.exists(name))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('core.storage.transaction.on_commit', side_effect=lambda f: f())
+class PostImageReferenceTests(TestCase):
+    """Ссылки снимаются при любом удалении или замене картинки поста."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, content=b'picture'):
+        post = Post(text='Пост', author=self.user)
+        post.image.save('cat.gif', ContentFile(content), save=False)
+        post.save()
+        return Post.objects.get(pk=post.pk)
+
+    def test_delete_releases_image(self, on_commit):
+        post = self.create_post()
+        name = post.image.name
+        post.delete()
+        self.assertFalse(content_storage.exists(name))
+        self.assertFalse(StoredBlob.objects.filter(name=name).exists())
+
+    def test_replacing_image_releases_old_one(self, on_commit):
+        post = self.create_post(b'old')
+        old = post.image.name
+        post.image.save('dog.gif', ContentFile(b'new'))
+        self.assertFalse(content_storage.exists(old))
+        self.assertTrue(content_storage.exists(post.image.name))
+
+    def test_same_content_upload_keeps_one_reference(self, on_commit):
+        """Повторная загрузка того же файла не копит ссылки."""
+        post = self.create_post()
+        name = post.image.name
+        for _ in range(3):
+            post.image.save('again.gif', ContentFile(b'picture'))
+        self.assertEqual(post.image.name, name)
+        self.assertEqual(StoredBlob.objects.get(name=name).refs, 1)
+        post.text = 'Другой текст'
+        post.save()
+        self.assertEqual(StoredBlob.objects.get(name=name).refs, 1)
+        post.delete()
+        self.assertFalse(content_storage.exists(name))
+
+    def test_clearing_image_releases_it(self, on_commit):
+        post = self.create_post()
+        name = post.image.name
+        post.image = ''
+        post.save()
+        self.assertFalse(content_storage.exists(name))
+
+    def test_unchanged_image_keeps_reference(self, on_commit):
+        post = self.create_post()
+        post.text = 'Другой текст'
+        post.save()
+        self.assertEqual(StoredBlob.objects.get(name=post.image.name).refs, 1)
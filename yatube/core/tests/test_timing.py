@@ -0,0 +1,51 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import timing
+
+
+class TimingsTests(TestCase):
+    def test_nested_phases_are_exclusive(self):
+        clock = iter([0.0, 1.0, 2.0, 5.0, 6.0, 10.0])
+        with mock.patch('core.timing.time.perf_counter', lambda: next(clock)):
+            timings = timing.Timings()
+            timings.enter(timing.TEMPLATE)
+            timings.enter(timing.DB)
+            timings.exit()
+            timings.exit()
+            values = timings.as_dict()
+        self.assertEqual(values[timing.TEMPLATE], 2000)
+        self.assertEqual(values[timing.DB], 3000)
+        self.assertEqual(values['app'], 5000)
+        self.assertEqual(values['total'], 10000)
+
+    def test_measure_outside_request_is_noop(self):
+        self.assertIsNone(timing.current())
+        with timing.measure(timing.DB):
+            pass
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_header_and_log_line(self):
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+        header = response['Server-Timing']
+        for phase in ('db;', 'tpl;', 'total;'):
+            self.assertIn(phase, header)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['db_count'], 0)
+        self.assertGreater(record['tpl_count'], 0)
+
+    @override_settings(SERVER_TIMING_ENABLED=False)
+    def test_can_be_disabled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
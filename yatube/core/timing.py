@@ -0,0 +1,201 @@
+import collections
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+
+DB = 'db'
+TEMPLATE = 'tpl'
+CACHE = 'cache'
+THUMBNAIL = 'thumb'
+PHASES = (DB, TEMPLATE, CACHE, THUMBNAIL)
+# Заголовки HTTP допускают только latin-1.
+DESCRIPTIONS = {
+    DB: 'SQL',
+    TEMPLATE: 'Templates',
+    CACHE: 'Cache',
+    THUMBNAIL: 'Thumbnails',
+}
+CACHE_METHODS = (
+    'add', 'set', 'touch', 'delete', 'get_many', 'set_many',
+    'delete_many', 'has_key', 'incr', 'decr', 'get_or_set', 'clear',
+)
+
+PAGE_CACHE_PREFIX = 'views.decorators.cache.cache_page.'
+PAGE_HEADER_PREFIX = 'views.decorators.cache.cache_header.'
+
+_current = contextvars.ContextVar('timings', default=None)
+_installed = False
+
+
+class Timings:
+    """Время запроса по фазам без учёта вложенных фаз.
+
+    Если фаза начинается внутри другой (запрос к базе из шаблона),
+    время внешней фазы приостанавливается, поэтому суммы по фазам
+    не пересекаются и вместе не превышают общего времени.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(PHASES, 0)
+        self.cache_lookups = collections.Counter()
+        self._stack = []
+        self._resumed = 0.0
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        if self._stack:
+            self.durations[self._stack[-1]] += now - self._resumed
+        if not self._stack or self._stack[-1] != phase:
+            self.counts[phase] += 1
+        self._stack.append(phase)
+        self._resumed = now
+
+    def exit(self):
+        now = time.perf_counter()
+        self.durations[self._stack.pop()] += now - self._resumed
+        self._resumed = now
+
+    def cache_lookup(self, key, hit):
+        """Учитывает попадание или промах; страницы — по key_prefix."""
+        if not isinstance(key, str) or key.startswith(PAGE_HEADER_PREFIX):
+            return
+        kind = 'data'
+        if key.startswith(PAGE_CACHE_PREFIX):
+            kind = 'page:' + key[len(PAGE_CACHE_PREFIX):].split('.', 1)[0]
+        self.cache_lookups[kind, hit] += 1
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        """Длительности в миллисекундах и число обращений по фазам."""
+        total = self.total()
+        result = {'total': total * 1000}
+        for phase in PHASES:
+            result[phase] = self.durations[phase] * 1000
+            result[f'{phase}_count'] = self.counts[phase]
+        result['app'] = (total - sum(self.durations.values())) * 1000
+        return result
+
+
+def start():
+    """Начинает замер; возвращает токен для finish()."""
+    timings = Timings()
+    return timings, _current.set(timings)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def measure(phase):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    timings.enter(phase)
+    try:
+        yield
+    finally:
+        timings.exit()
+
+
+def timed(phase, function):
+    """Обёртка, относящая время вызова function к фазе phase."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        timings = _current.get()
+        if timings is None:
+            return function(*args, **kwargs)
+        timings.enter(phase)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings.exit()
+
+    wrapper.timed_phase = phase
+    return wrapper
+
+
+def timed_cache_get(function):
+    """Как timed(CACHE, ...), но ещё считает попадания в кеш."""
+    @functools.wraps(function)
+    def wrapper(self, key, default=None, version=None):
+        timings = _current.get()
+        if timings is None:
+            return function(self, key, default, version)
+        timings.enter(CACHE)
+        try:
+            value = function(self, key, default, version)
+        finally:
+            timings.exit()
+        timings.cache_lookup(key, value is not default)
+        return value
+
+    wrapper.timed_phase = CACHE
+    return wrapper
+
+
+def query_wrapper(execute, sql, params, many, context):
+    """Обёртка для connection.execute_wrapper()."""
+    with measure(DB):
+        return execute(sql, params, many, context)
+
+
+def _patch(owner, name, phase, wrap=None):
+    function = getattr(owner, name, None)
+    if function is None or getattr(function, 'timed_phase', None):
+        return
+    if wrap is None:
+        wrap = functools.partial(timed, phase)
+    setattr(owner, name, wrap(function))
+
+
+def install():
+    """Подключает замеры к шаблонам, кешу и sorl-thumbnail.
+
+    Обёртки ставятся на классы один раз при старте. Вне запроса они
+    сводятся к чтению contextvar, поэтому не мешают командам и
+    фоновым задачам.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.template.base import Template
+
+    _patch(Template, 'render', TEMPLATE)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        _patch(backend, 'get', CACHE, timed_cache_get)
+        for name in CACHE_METHODS:
+            _patch(backend, name, CACHE)
+    try:
+        from sorl.thumbnail.base import ThumbnailBackend
+    except ImportError:
+        return
+    _patch(ThumbnailBackend, 'get_thumbnail', THUMBNAIL)
+
+
+def header(values):
+    """Значение заголовка Server-Timing."""
+    parts = []
+    for phase in PHASES:
+        if values[f'{phase}_count']:
+            parts.append(
+                f'{phase};dur={values[phase]:.1f};'
+                f'desc="{DESCRIPTIONS[phase]} ({values[phase + "_count"]})"'
+            )
+    parts.append(f'app;dur={values["app"]:.1f}')
+    parts.append(f'total;dur={values["total"]:.1f}')
+    return ', '.join(parts)
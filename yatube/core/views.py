@@ -1,5 +1,13 @@
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
 
+from . import metrics as metrics_registry
+from . import profiling
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию;
@@ -9,3 +17,48 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Метрики в текстовом формате Prometheus.
+
+    Доступны с адресов из INTERNAL_IPS и сотрудникам, остальным
+    страница не видна.
+    """
+    internal = request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+    if not (internal or request.user.is_staff):
+        raise Http404
+    return HttpResponse(
+        metrics_registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@staff_member_required
+def profile_list(request):
+    profiles = [profiling.load_meta(name) for name in profiling.list_names()]
+    return render(request, 'core/profile_list.html', {
+        'profiles': profiles,
+        'token': profiling.make_token(),
+    })
+
+
+@staff_member_required
+def profile_detail(request, name):
+    if not profiling.NAME_PATTERN.match(name):
+        raise Http404
+    try:
+        meta = profiling.load_meta(name)
+    except FileNotFoundError:
+        raise Http404
+    if 'download' in request.GET:
+        path = profiling.data_path(name, meta['mode'])
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=os.path.basename(path),
+        )
+    return render(request, 'core/profile_detail.html', {
+        'profile': meta,
+        'summary': profiling.summary(name, meta['mode']),
+    })
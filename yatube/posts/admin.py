@@ -1,15 +1,133 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.core.cache import cache
+from django.template.response import TemplateResponse
 
+from . import bulk, groups, search
 from .models import Group, Post
+from .paginators import CachedCountPaginator
+
+GROUP_CHOICES_KEY = 'admin:group_choices:{}'
+GROUP_CHOICES_CACHE_TIME = 60 * 60
+
+
+def group_choices():
+    """Варианты выбора группы для всех строк списка разом.
+
+    Без этого каждое редактируемое поле group в списке постов
+    выполняет собственный запрос к таблице групп.
+    """
+    version = cache.get_or_set(groups.LIST_VERSION_KEY, 1, None)
+    return cache.get_or_set(
+        GROUP_CHOICES_KEY.format(version),
+        lambda: [('', '---------')] + list(
+            Group.objects.order_by('title').values_list('id', 'title')
+        ),
+        GROUP_CHOICES_CACHE_TIME,
+    )
+
+
+class PostActionForm(helpers.ActionForm):
+    group = forms.TypedChoiceField(
+        label='Группа', coerce=int, empty_value=None, required=False
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'].choices = group_choices()
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group', 'image')
     # list_display = ('pk', '__str__', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+    action_form = PostActionForm
+    actions = ('move_to_group', 'delete_posts', 'clear_images')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group':
+            field.choices = group_choices()
+        return field
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.is_supported(queryset.db):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        if not search.match_expression(search_term):
+            return queryset, False
+        return queryset.filter(id__in=search.matching_ids(search_term)), False
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Стандартное удаление грузит все объекты в одну транзакцию.
+        actions.pop('delete_selected', None)
+        return actions
+
+    def run_bulk(self, request, queryset, operation, group_id=None):
+        post_ids = list(queryset.order_by().values_list('pk', flat=True))
+        if len(post_ids) > bulk.BACKGROUND_THRESHOLD:
+            queued = bulk.run_in_background.delay(
+                operation, post_ids, group_id
+            )
+            self.message_user(
+                request,
+                f'Постов: {len(post_ids)}. Операция поставлена в очередь'
+                + (f' (задача #{queued.pk}).' if queued else '.'),
+            )
+            return
+        chunks = []
+        done = bulk.run(
+            operation, post_ids, group_id,
+            progress=lambda done, total: chunks.append(done),
+        )
+        self.message_user(
+            request,
+            f'Обработано постов: {done}, пачек: {len(chunks)}.',
+        )
+
+    def move_to_group(self, request, queryset):
+        group_id = request.POST.get('group', '')
+        if not (
+            group_id.isdigit() and Group.objects.filter(pk=group_id).exists()
+        ):
+            self.message_user(
+                request, 'Выберите группу для переноса.', messages.ERROR
+            )
+            return
+        self.run_bulk(request, queryset, bulk.MOVE, int(group_id))
+    move_to_group.short_description = 'Перенести в выбранную группу'
+
+    def delete_posts(self, request, queryset):
+        if request.POST.get('confirm') != 'yes':
+            context = {
+                **self.admin_site.each_context(request),
+                'opts': self.model._meta,
+                'count': queryset.count(),
+                'selected': request.POST.getlist(
+                    helpers.ACTION_CHECKBOX_NAME
+                ),
+                'select_across': request.POST.get('select_across'),
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            }
+            return TemplateResponse(
+                request, 'admin/posts/post/bulk_delete.html', context
+            )
+        self.run_bulk(request, queryset, bulk.DELETE)
+    delete_posts.short_description = 'Удалить выбранные посты'
+    delete_posts.allowed_permissions = ('delete',)
+
+    def clear_images(self, request, queryset):
+        self.run_bulk(request, queryset, bulk.CLEAR_IMAGES)
+    clear_images.short_description = 'Убрать картинки'
 
 
 admin.site.register(Post, PostAdmin)
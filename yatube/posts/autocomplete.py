@@ -0,0 +1,123 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.db import transaction
+from django.urls import reverse
+
+from .models import Group, User
+
+REBUILD_INTERVAL = 10 * 60
+MAX_RESULTS = 10
+AUTHOR = 'author'
+GROUP = 'group'
+
+
+class PrefixIndex:
+    """Отсортированный массив ключей для поиска по префиксу.
+
+    Поиск — это bisect до первого подходящего ключа и проход вперёд,
+    пока ключи начинаются с префикса. Изменения вносятся точечно:
+    старые ключи объекта удаляются, новые вставляются на своё место.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = []
+        self.by_object = {}
+        self.built_at = None
+
+    def build(self):
+        entries = []
+        by_object = {}
+        users = User.objects.filter(is_active=True).values_list(
+            'id', 'username'
+        )
+        for user_id, username in users.iterator():
+            self._collect(entries, by_object, *author_entry(user_id, username))
+        for group_id, title, slug in Group.objects.values_list(
+            'id', 'title', 'slug'
+        ).iterator():
+            self._collect(
+                entries, by_object, *group_entry(group_id, title, slug)
+            )
+        entries.sort()
+        with self.lock:
+            self.keys = entries
+            self.by_object = by_object
+            self.built_at = time.monotonic()
+
+    @staticmethod
+    def _collect(entries, by_object, identity, keys):
+        by_object[identity] = keys
+        entries.extend(keys)
+
+    def ensure_built(self):
+        if (
+            self.built_at is None
+            or time.monotonic() - self.built_at > REBUILD_INTERVAL
+        ):
+            self.build()
+
+    def update(self, identity, keys=()):
+        """Заменяет ключи объекта; пустой keys удаляет объект."""
+        if self.built_at is None:
+            return
+        with self.lock:
+            for key in self.by_object.pop(identity, ()):
+                position = bisect_left(self.keys, key)
+                if position < len(self.keys) and self.keys[position] == key:
+                    del self.keys[position]
+            for key in keys:
+                insort(self.keys, key)
+            if keys:
+                self.by_object[identity] = keys
+
+    def search(self, prefix, limit=MAX_RESULTS):
+        prefix = prefix.casefold()
+        results = []
+        seen = set()
+        with self.lock:
+            position = bisect_left(self.keys, (prefix,))
+            while position < len(self.keys) and len(results) < limit:
+                key, kind, object_id, label, url = self.keys[position]
+                if not key.startswith(prefix):
+                    break
+                if (kind, object_id) not in seen:
+                    seen.add((kind, object_id))
+                    results.append({'type': kind, 'label': label, 'url': url})
+                position += 1
+        return results
+
+
+def author_entry(user_id, username):
+    url = reverse('posts:profile', args=(username,))
+    return (
+        (AUTHOR, user_id),
+        [(username.casefold(), AUTHOR, user_id, username, url)],
+    )
+
+
+def group_entry(group_id, title, slug):
+    url = reverse('posts:group_list', args=(slug,))
+    keys = {
+        (name.casefold(), GROUP, group_id, title, url)
+        for name in (title, slug)
+    }
+    return (GROUP, group_id), sorted(keys)
+
+
+index = PrefixIndex()
+
+
+def changed(identity, keys=()):
+    """Обновляет индекс после фиксации транзакции.
+
+    Откаченное переименование не должно остаться в поиске.
+    """
+    transaction.on_commit(lambda: index.update(identity, keys))
+
+
+def search(prefix, limit=MAX_RESULTS):
+    index.ensure_built()
+    return index.search(prefix, limit)
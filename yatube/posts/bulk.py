@@ -0,0 +1,93 @@
+import logging
+
+from django.db import transaction
+
+from core.storage import release_on_commit
+from tasks.decorators import task
+
+from . import groups, notifications, snapshots
+from .models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+BACKGROUND_THRESHOLD = 5000
+MOVE = 'move'
+DELETE = 'delete'
+CLEAR_IMAGES = 'clear_images'
+
+
+def chunked(ids, size=None):
+    size = size or CHUNK_SIZE
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def move_to_group(chunk, group_id):
+    with groups.deferred_stats() as touched:
+        touched.update(
+            Post.objects.filter(pk__in=chunk).values_list(
+                'group_id', flat=True
+            ).distinct()
+        )
+        touched.add(group_id)
+        return Post.objects.filter(pk__in=chunk).update(group_id=group_id)
+
+
+def delete(chunk, group_id=None):
+    # Комментарии удаляются одним DELETE без загрузки в память,
+    # тогда сборщику каскадов остаются только сами посты.
+    # Ссылки на картинки снимает сигнал post_delete.
+    Comment.objects.filter(post_id__in=chunk).delete()
+    notifications.posts_removed(chunk)
+    deleted, _ = Post.objects.filter(pk__in=chunk).delete()
+    return deleted
+
+
+def clear_images(chunk, group_id=None):
+    release_on_commit(_images(chunk))
+    return Post.objects.filter(pk__in=chunk).exclude(image='').update(
+        image=''
+    )
+
+
+def _images(chunk):
+    return Post.objects.filter(pk__in=chunk).exclude(image='').values_list(
+        'image', flat=True
+    )
+
+
+OPERATIONS = {
+    MOVE: move_to_group,
+    DELETE: delete,
+    CLEAR_IMAGES: clear_images,
+}
+
+
+def run(operation, post_ids, group_id=None, progress=None):
+    """Применяет операцию к постам пачками в коротких транзакциях.
+
+    Каждая пачка — отдельная транзакция, поэтому блокировка записи
+    SQLite не удерживается на всё время операции и её можно
+    безопасно прервать: обработанные пачки останутся обработанными.
+    """
+    post_ids = list(post_ids)
+    done = 0
+    with groups.deferred_stats() as touched:
+        for chunk in chunked(post_ids):
+            with transaction.atomic():
+                OPERATIONS[operation](chunk, group_id)
+            done += len(chunk)
+            logger.info(
+                '%s: обработано %s из %s', operation, done, len(post_ids)
+            )
+            if progress is not None:
+                progress(done, len(post_ids))
+    snapshots.schedule(touched)
+    return done
+
+
+@task(priority=-5)
+def run_in_background(operation, post_ids, group_id=None):
+    run(operation, post_ids, group_id)
@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models import F
+
+from core.storage import forget_acquired, release_on_commit
+
+from . import groups, snapshots
+from .models import Post
+
+
+class EditConflict(Exception):
+    """Пост изменили после того, как форма была открыта."""
+
+
+def save_changes(form, version=None):
+    """Сохраняет только изменённые поля поста одним UPDATE.
+
+    Условие version=... в том же UPDATE отсекает устаревшую правку
+    без блокировок: если кто-то успел сохранить пост раньше, строка
+    не обновится и будет выброшено EditConflict. Возвращает список
+    сохранённых полей.
+    """
+    post = form.instance
+    names = [name for name in form.changed_data if name in form.fields]
+    if not names:
+        return []
+    values = {}
+    stored = []
+    for name in names:
+        field = Post._meta.get_field(name)
+        value = field.pre_save(post, add=False)
+        if name == 'image' and value:
+            stored.append(value.name)
+        values[field.attname] = value
+    rows = Post.objects.filter(pk=post.pk)
+    if version is not None:
+        rows = rows.filter(version=version)
+    with transaction.atomic():
+        if not rows.update(version=F('version') + 1, **values):
+            for name in stored:
+                post.image.storage.delete(name)
+            raise EditConflict
+        snapshots.schedule([post._saved_group_id, post.group_id])
+        if 'group' in names:
+            groups.post_moved(
+                post._saved_group_id, post.group_id, post.pub_date
+            )
+            post._saved_group_id = post.group_id
+        if 'image' in names:
+            # Старая картинка больше не нужна этому посту.
+            release_on_commit([str(form.initial.get('image') or '')])
+            post._saved_image = post.image.name
+            forget_acquired(post, 'image')
+    return names
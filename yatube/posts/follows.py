@@ -0,0 +1,56 @@
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow
+
+CACHE_KEY = 'follows:{}'
+CACHE_TIME = 60 * 60
+
+
+def _cache_key(user_id):
+    return CACHE_KEY.format(user_id)
+
+
+def enabled():
+    # Подписку сбрасывает только процесс, который её обработал:
+    # с LocMemCache другие процессы показывали бы старое состояние.
+    return getattr(settings, 'SHARED_CACHE', True)
+
+
+def following_ids(user):
+    """Множество id авторов, на которых подписан пользователь.
+
+    В общем кеше список хранится упакованным массивом 64-битных
+    чисел, а в пределах запроса — ещё и на самом объекте пользователя.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    ids = getattr(user, '_following_ids', None)
+    if ids is not None:
+        return ids
+    packed = cache.get(_cache_key(user.pk)) if enabled() else None
+    if packed is None:
+        author_ids = Follow.objects.filter(user=user).values_list(
+            'author_id', flat=True
+        )
+        packed = array('q', sorted(author_ids)).tobytes()
+        if enabled():
+            cache.set(_cache_key(user.pk), packed, CACHE_TIME)
+    unpacked = array('q')
+    unpacked.frombytes(packed)
+    user._following_ids = frozenset(unpacked)
+    return user._following_ids
+
+
+def is_following(user, authors):
+    """Отвечает разом для списка авторов: {id автора: подписан ли}."""
+    ids = following_ids(user)
+    return {
+        author.pk: author.pk in ids for author in authors
+    }
+
+
+def invalidate(user_id):
+    cache.delete(_cache_key(user_id))
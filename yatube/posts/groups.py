@@ -0,0 +1,134 @@
+import threading
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db.models import F, Max, Q
+
+from .models import Group, Post
+
+VERSION_KEY = 'groups:version'
+# Меняется только при сохранении и удалении групп, но не при записи
+# постов: от него зависят кеши, которым счётчики постов не важны.
+LIST_VERSION_KEY = 'groups:list_version'
+PAGE_KEY = 'groups:page:{}:{}'
+CACHE_TIME = 60 * 60
+GROUPS_PER_PAGE = 20
+
+_deferred = threading.local()
+
+
+def bump_version(key=VERSION_KEY):
+    """Сбрасывает все закешированные страницы каталога групп."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+@contextmanager
+def deferred_stats():
+    """Откладывает обновление счётчиков до конца блока.
+
+    Сигналы постов внутри блока только запоминают затронутые группы,
+    а на выходе они пересчитываются одним проходом. Так массовые
+    операции не платят несколько запросов за каждый пост.
+    """
+    if getattr(_deferred, 'groups', None) is not None:
+        yield _deferred.groups
+        return
+    _deferred.groups = set()
+    try:
+        yield _deferred.groups
+    finally:
+        touched, _deferred.groups = _deferred.groups, None
+        recount(touched)
+
+
+def deferring():
+    return getattr(_deferred, 'groups', None) is not None
+
+
+def is_deferred(group_id):
+    touched = getattr(_deferred, 'groups', None)
+    if touched is None:
+        return False
+    touched.add(group_id)
+    return True
+
+
+def post_added(group_id, pub_date):
+    if is_deferred(group_id):
+        return
+    Group.objects.filter(pk=group_id).update(
+        posts_count=F('posts_count') + 1
+    )
+    Group.objects.filter(
+        Q(last_post_at__lt=pub_date) | Q(last_post_at__isnull=True),
+        pk=group_id,
+    ).update(last_post_at=pub_date)
+    bump_version()
+
+
+def post_removed(group_id):
+    if is_deferred(group_id):
+        return
+    last = Post.objects.filter(group_id=group_id).aggregate(
+        last=Max('pub_date')
+    )['last']
+    Group.objects.filter(pk=group_id, posts_count__gt=0).update(
+        posts_count=F('posts_count') - 1
+    )
+    Group.objects.filter(pk=group_id).update(last_post_at=last)
+    bump_version()
+
+
+def post_moved(old_group_id, new_group_id, pub_date):
+    if old_group_id == new_group_id:
+        return
+    if old_group_id is not None:
+        post_removed(old_group_id)
+    if new_group_id is not None:
+        post_added(new_group_id, pub_date)
+
+
+def recount(group_ids):
+    """Пересчитывает счётчики групп с нуля.
+
+    Нужен после массовых update() и delete() по постам, которые
+    не присылают сигналов.
+    """
+    for group_id in set(group_ids) - {None}:
+        stats = Post.objects.filter(group_id=group_id).aggregate(
+            last=Max('pub_date')
+        )
+        Group.objects.filter(pk=group_id).update(
+            posts_count=Post.objects.filter(group_id=group_id).count(),
+            last_post_at=stats['last'],
+        )
+    bump_version()
+
+
+def directory_page(after=None, size=GROUPS_PER_PAGE):
+    """Страница каталога групп по ключу (title, id) и id последней.
+
+    Готовая страница кешируется до следующего изменения групп
+    или их счётчиков.
+    """
+    key = PAGE_KEY.format(cache.get_or_set(VERSION_KEY, 1, None), after)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    groups = Group.objects.order_by('title', 'id')
+    if after is not None:
+        anchor = Group.objects.filter(pk=after).values_list(
+            'title', flat=True
+        ).first()
+        if anchor is not None:
+            groups = groups.filter(title__gte=anchor).exclude(
+                title=anchor, id__lte=after
+            )
+    page = list(groups[:size + 1])
+    next_after = page[size - 1].pk if len(page) > size else None
+    result = (page[:size], next_after)
+    cache.set(key, result, CACHE_TIME)
+    return result
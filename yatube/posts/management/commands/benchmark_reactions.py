@@ -0,0 +1,104 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.test import override_settings
+
+from core.slowlog import percentile
+from posts import reactions
+from posts.models import Post, Reaction, ReactionCounter
+
+User = get_user_model()
+
+PREFIX = 'reactbench-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет скорость отметок одного поста из нескольких потоков '
+        'при разном числе частей счётчика. Работает с текущей базой: '
+        f'создаёт пользователей {PREFIX}* и пост и удаляет их в конце.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--likes', type=int, default=200,
+            help='Отметок от каждого потока.',
+        )
+        parser.add_argument(
+            '--shards', default='1,8',
+            help='Числа частей счётчика через запятую.',
+        )
+
+    def prepare(self, count):
+        User.objects.bulk_create(
+            User(username=f'{PREFIX}{number}') for number in range(count)
+        )
+        users = list(User.objects.filter(username__startswith=PREFIX))
+        post = Post.objects.create(author=users[0], text='Популярный пост')
+        return users, post
+
+    def run(self, users, post, threads):
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(chunk):
+            own, failed = [], 0
+            try:
+                for user in chunk:
+                    started = time.perf_counter()
+                    try:
+                        reactions.like(user, post.pk)
+                    except OperationalError:
+                        failed += 1
+                        continue
+                    own.append(time.perf_counter() - started)
+            finally:
+                connections.close_all()
+            with lock:
+                latencies.extend(own)
+                errors.append(failed)
+
+        workers = [
+            threading.Thread(target=worker, args=(users[number::threads],))
+            for number in range(threads)
+        ]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return sorted(latencies), sum(errors), time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        users, post = self.prepare(threads * options['likes'])
+        self.stdout.write(
+            f'{"частей":>7}{"отметок/с":>11}{"p50, мс":>9}{"p95, мс":>9}'
+            f'{"ошибок":>8}{"итог":>7}'
+        )
+        try:
+            for shards in map(int, options['shards'].split(',')):
+                with override_settings(REACTION_SHARDS=shards):
+                    latencies, errors, elapsed = self.run(
+                        users, post, threads
+                    )
+                total = reactions.totals([post.pk])[post.pk]
+                p50, p95 = (
+                    percentile(latencies, fraction) * 1000 if latencies else 0
+                    for fraction in (0.5, 0.95)
+                )
+                self.stdout.write(
+                    f'{shards:>7}{len(latencies) / elapsed:>11.0f}'
+                    f'{p50:>9.2f}{p95:>9.2f}{errors:>8}{total:>7}'
+                )
+                Reaction.objects.filter(post=post).delete()
+                ReactionCounter.objects.filter(post=post).delete()
+                reactions.invalidate(post.pk)
+        finally:
+            post.delete()
+            User.objects.filter(username__startswith=PREFIX).delete()
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «Кого почитать» по графу подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Пересчитать только пользователей с изменившимся '
+                 'окружением.',
+        )
+        parser.add_argument(
+            '--top', type=int, default=recommendations.TOP_K,
+            help='Сколько рекомендаций хранить на пользователя.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=recommendations.BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        build = (
+            recommendations.refresh if options['incremental']
+            else recommendations.rebuild
+        )
+        users, stored = build(options['top'], options['batch_size'])
+        self.stdout.write(
+            f'Пользователей пересчитано: {users}, рекомендаций: {stored}'
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново собирает HTML-снимки главной и лент групп для анонимных '
+        'посетителей и удаляет снимки удалённых групп. Запускайте после '
+        'выкладки шаблонов.'
+    )
+
+    def handle(self, *args, **options):
+        snapshots.build_all()
+        self.stdout.write(f'Снимки собраны в {snapshots.directory()}')
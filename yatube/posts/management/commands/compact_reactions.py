@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import reactions
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит части счётчиков отметок в одну строку на пост. '
+        'Запускайте периодически, например раз в час из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recount', action='store_true',
+            help='Пересчитать счётчики по таблице отметок.',
+        )
+
+    def handle(self, *args, **options):
+        posts = reactions.compact(recount=options['recount'])
+        self.stdout.write(f'Счётчики сведены для постов: {posts}')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Применяет затухание к рейтингу популярности. '
+        'Запускайте периодически, например раз в час из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать оценки всех постов с нуля.',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            posts = trending.rebuild()
+            self.stdout.write(f'Оценки пересчитаны для постов: {posts}')
+            return
+        posts = trending.decay()
+        self.stdout.write(f'Затухание применено к постам: {posts}')
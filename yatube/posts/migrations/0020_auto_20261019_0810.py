@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:10
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    stats = Group.objects.annotate(
+        total=Count('posts'), last=Max('posts__pub_date')
+    ).values_list('id', 'total', 'last')
+    for group_id, total, last in stats:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=total, last_post_at=last
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_auto_20261019_0809'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последний пост'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество постов'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['title', 'id'], name='group_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='post_group_date_idx'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
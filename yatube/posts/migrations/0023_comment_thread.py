@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+SEGMENT_WIDTH = 7
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def segment(pk):
+    digits = ''
+    while pk:
+        pk, rest = divmod(pk, len(DIGITS))
+        digits = DIGITS[rest] + digits
+    return digits.rjust(SEGMENT_WIDTH, '0')
+
+
+def fill_paths(apps, schema_editor):
+    # Все существующие комментарии — корни своих веток.
+    Comment = apps.get_model('posts', 'Comment')
+    batch = []
+    for comment in Comment.objects.only('pk').iterator():
+        comment.path = segment(comment.pk)
+        batch.append(comment)
+        if len(batch) == 500:
+            Comment.objects.bulk_update(batch, ['path'])
+            batch = []
+    Comment.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_auto_20261019_0820'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Глубина'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, help_text='Пути предков и собственный id: ветка идёт подряд', max_length=255, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_thread_idx'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
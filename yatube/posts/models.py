@@ -2,6 +2,8 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models.constraints import UniqueConstraint
 
+from core.storage import content_storage, track_references
+
 User = get_user_model()
 
 POST_LENGTH = 15
@@ -11,6 +13,22 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0,
+        editable=False
+    )
+    last_post_at = models.DateTimeField(
+        verbose_name='Последний пост',
+        blank=True,
+        null=True,
+        editable=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'id'], name='group_title_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -38,15 +56,34 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Группа, к которой будет относиться пост'
     )
-    image = models.ImageField(
+    image = track_references(models.ImageField(
         verbose_name='Картинка',
         upload_to='posts/',
+        storage=content_storage,
         blank=True
+    ))
+    trending_score = models.FloatField(
+        verbose_name='Популярность',
+        default=0,
+        editable=False
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=0,
+        editable=False
     )
 
     class Meta:
         default_related_name = 'posts'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-trending_score', '-id'], name='post_trending_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date'], name='post_group_date_idx'
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -63,7 +100,9 @@ class Comment(models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        verbose_name='Автор'
+        null=True,
+        verbose_name='Автор',
+        help_text='Пусто у удалённого комментария, на который есть ответы'
     )
     text = models.TextField(
         verbose_name='Текст поста',
@@ -73,10 +112,33 @@ class Comment(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
+    path = models.CharField(
+        verbose_name='Путь в ветке',
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text='Пути предков и собственный id: ветка идёт подряд'
+    )
+    depth = models.PositiveSmallIntegerField(
+        verbose_name='Глубина',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         default_related_name = 'comments'
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['post', 'path'], name='comment_thread_idx'),
+        ]
 
     def __str__(self):
         return self.text[:POST_LENGTH]
@@ -103,3 +165,138 @@ class Follow(models.Model):
                 name='unique_subscription',
             )
         ]
+
+
+class TrendingClock(models.Model):
+    """Момент последнего затухания рейтинга популярности.
+
+    Оценки всех постов приведены к этому моменту, поэтому новые
+    события взвешиваются относительно него. Запись всегда одна.
+    """
+    decayed_at = models.DateTimeField(verbose_name='Затухание применено')
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='recommendations'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Рекомендуемый автор',
+        related_name='+'
+    )
+    score = models.FloatField(verbose_name='Оценка')
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_recommendation',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'], name='recommendation_user_idx'
+            ),
+        ]
+
+
+class FollowGraphChange(models.Model):
+    """Журнал изменений подписок для инкрементального пересчёта.
+
+    Хранит голые id, а не внешние ключи: запись должна пережить
+    удаление пользователя, вызвавшее отписку.
+    """
+    user_id = models.PositiveIntegerField()
+    author_id = models.PositiveIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+
+class Reaction(models.Model):
+    """Отметка «нравится»: одна на пользователя и пост."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='reactions'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='reactions'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_reaction',
+            )
+        ]
+
+
+class ReactionCounter(models.Model):
+    """Одна из частей счётчика отметок поста.
+
+    Отметка увеличивает случайную часть, поэтому одновременные
+    отметки популярного поста пишут в разные строки. Сумма частей —
+    число отметок; compact_reactions сводит их в одну.
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='reaction_counters'
+    )
+    shard = models.PositiveSmallIntegerField(verbose_name='Часть')
+    count = models.IntegerField(verbose_name='Отметок', default=0)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=['post', 'shard'],
+                name='unique_reaction_shard',
+            )
+        ]
+
+
+class Notification(models.Model):
+    """Уведомление подписчика о новом посте автора."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Получатель',
+        related_name='notifications'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='notifications'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    is_read = models.BooleanField(verbose_name='Прочитано', default=False)
+
+    class Meta:
+        ordering = ['-id']
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_notification',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-id'], name='notification_inbox_idx'
+            ),
+            models.Index(
+                fields=['user', 'is_read'], name='notification_unread_idx'
+            ),
+        ]
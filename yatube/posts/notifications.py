@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core import fragments
+from tasks.decorators import task
+
+from .models import Follow, Notification, Post
+
+CHUNK_SIZE = 1000
+CHUNKS_PER_RUN = 10
+PAGE_SIZE = 20
+UNREAD_KEY = 'notifications:unread:{}'
+CACHE_TIME = 60 * 60
+
+
+def _unread_key(user_id):
+    return UNREAD_KEY.format(user_id)
+
+
+def unread_changed(user_ids):
+    """Сбрасывает счётчики непрочитанного и шапку, где он выводится."""
+    cache.delete_many([_unread_key(user_id) for user_id in user_ids])
+    for user_id in user_ids:
+        fragments.invalidate(user_id)
+
+
+def unread_count(user):
+    if not user.is_authenticated:
+        return 0
+    if not getattr(settings, 'UNREAD_CACHE_ENABLED', True):
+        return Notification.objects.filter(user=user, is_read=False).count()
+    return cache.get_or_set(
+        _unread_key(user.pk),
+        lambda: Notification.objects.filter(user=user, is_read=False).count(),
+        CACHE_TIME,
+    )
+
+
+def posts_removed(post_ids):
+    """Сбрасывает счётчики тех, у кого были непрочитанные уведомления
+    об удаляемых постах.
+
+    Вызывается до удаления: каскад уберёт строки уведомлений, и после
+    него уже не узнать, чьи счётчики устарели.
+    """
+    user_ids = list(
+        Notification.objects.filter(
+            post_id__in=post_ids, is_read=False
+        ).values_list('user_id', flat=True).distinct()
+    )
+    if user_ids:
+        transaction.on_commit(lambda: unread_changed(user_ids))
+
+
+def post_created(post):
+    """Ставит рассылку после фиксации транзакции.
+
+    Сам запрос на создание поста не зависит от числа подписчиков:
+    он только проверяет, есть ли они, и ставит одну задачу.
+    """
+    if Follow.objects.filter(author_id=post.author_id).exists():
+        transaction.on_commit(lambda: fan_out.delay(post.pk))
+
+
+@task(priority=-1)
+def fan_out(post_id, after=0):
+    """Раздаёт уведомления подписчикам автора пачками.
+
+    Подписчики идут по возрастанию id, начиная после after. За один
+    запуск обрабатывается не больше CHUNKS_PER_RUN пачек, затем задача
+    ставит своё продолжение: очередь не занята надолго одним автором
+    с огромным числом подписчиков.
+    """
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is None:
+        return
+    followers = Follow.objects.filter(author_id=author_id).order_by(
+        'user_id'
+    ).values_list('user_id', flat=True)
+    for _ in range(CHUNKS_PER_RUN):
+        user_ids = list(followers.filter(user_id__gt=after)[:CHUNK_SIZE])
+        if not user_ids:
+            return
+        with transaction.atomic():
+            Notification.objects.bulk_create(
+                (
+                    Notification(user_id=user_id, post_id=post_id)
+                    for user_id in user_ids
+                ),
+                ignore_conflicts=True,
+            )
+        unread_changed(user_ids)
+        after = user_ids[-1]
+        if len(user_ids) < CHUNK_SIZE:
+            return
+    fan_out.delay(post_id, after)
+
+
+def inbox_page(user, before=None, size=PAGE_SIZE):
+    """Страница уведомлений от новых к старым по ключу id.
+
+    Возвращает уведомления и id для ссылки на следующую страницу.
+    """
+    notifications = Notification.objects.filter(user=user).select_related(
+        'post__author'
+    )
+    if before is not None:
+        notifications = notifications.filter(pk__lt=before)
+    page = list(notifications[:size + 1])
+    next_before = page[size - 1].pk if len(page) > size else None
+    return page[:size], next_before
+
+
+def mark_read(user, notifications):
+    updated = Notification.objects.filter(
+        user=user,
+        pk__in=[item.pk for item in notifications if not item.is_read],
+    ).update(is_read=True)
+    if updated:
+        unread_changed([user.pk])
+    return updated
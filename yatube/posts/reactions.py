@@ -0,0 +1,202 @@
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from . import snapshots
+from .models import Post, Reaction, ReactionCounter
+
+SHARDS = 8
+CACHE_KEY = 'reactions:{}:{}'
+VERSION_KEY = 'reactions:version:{}'
+CACHE_TIME = 10 * 60
+
+
+def shards():
+    return getattr(settings, 'REACTION_SHARDS', SHARDS)
+
+
+def _cache_key(post_id, version):
+    return CACHE_KEY.format(post_id, version)
+
+
+def _version_key(post_id):
+    return VERSION_KEY.format(post_id)
+
+
+def bump(post_id, delta):
+    """Добавляет delta к случайной части счётчика поста.
+
+    Строка части создаётся при первом обращении; если её
+    одновременно создал другой запрос, повторяем UPDATE.
+    """
+    shard = random.randrange(shards())
+    rows = ReactionCounter.objects.filter(post_id=post_id, shard=shard)
+    if rows.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            ReactionCounter.objects.create(
+                post_id=post_id, shard=shard, count=delta
+            )
+    except IntegrityError:
+        rows.update(count=F('count') + delta)
+
+
+def invalidate(post_id):
+    """Переходит к новой версии суммы поста.
+
+    Версия, а не удаление ключа: чтение, начатое до отметки, запишет
+    старую сумму под старой версией, и её уже никто не прочитает.
+    """
+    try:
+        cache.incr(_version_key(post_id))
+    except ValueError:
+        cache.set(_version_key(post_id), 1, None)
+
+
+def _changed(post_id):
+    transaction.on_commit(lambda: invalidate(post_id))
+
+
+def _feed_changed(post_ids):
+    # Числа отметок выводятся в карточках ленты, поэтому снимки
+    # страниц с этими постами нужно перестроить. Группы запрашиваются,
+    # только если снимки включены.
+    snapshots.schedule(
+        Post.objects.filter(pk__in=post_ids).values_list(
+            'group_id', flat=True
+        )
+    )
+
+
+def like(user, post_id):
+    """Ставит отметку; False, если она уже стояла."""
+    try:
+        with transaction.atomic():
+            Reaction.objects.create(user=user, post_id=post_id)
+            bump(post_id, 1)
+    except IntegrityError:
+        return False
+    _changed(post_id)
+    _feed_changed([post_id])
+    return True
+
+
+def unlike(user, post_id):
+    """Снимает отметку; False, если её не было."""
+    with transaction.atomic():
+        deleted, _ = Reaction.objects.filter(
+            user=user, post_id=post_id
+        ).delete()
+        if deleted:
+            bump(post_id, -1)
+    if deleted:
+        _changed(post_id)
+        _feed_changed([post_id])
+    return bool(deleted)
+
+
+def forget(reaction_ids):
+    """Удаляет отметки пачкой и вычитает их из счётчиков постов.
+
+    Нужно при удалении пользователя: каскадное удаление отметок
+    счётчики не уменьшит.
+    """
+    reactions = Reaction.objects.filter(pk__in=reaction_ids)
+    with transaction.atomic():
+        per_post = Counter(reactions.values_list('post_id', flat=True))
+        reactions.delete()
+        for post_id, count in per_post.items():
+            bump(post_id, -count)
+    for post_id in per_post:
+        _changed(post_id)
+    if per_post:
+        _feed_changed(list(per_post))
+    return sum(per_post.values())
+
+
+def has_liked(user, post_id):
+    return user.is_authenticated and Reaction.objects.filter(
+        user=user, post_id=post_id
+    ).exists()
+
+
+def totals(post_ids):
+    """Число отметок для списка постов: {id: число}.
+
+    Версии и готовые суммы берутся из кеша двумя get_many,
+    недостающие считаются одним запросом по частям счётчиков.
+    """
+    post_ids = set(post_ids)
+    version_keys = {_version_key(post_id): post_id for post_id in post_ids}
+    versions = dict.fromkeys(post_ids, 0)
+    versions.update(
+        (version_keys[key], version)
+        for key, version in cache.get_many(version_keys).items()
+    )
+    keys = {
+        _cache_key(post_id, versions[post_id]): post_id
+        for post_id in post_ids
+    }
+    result = {
+        keys[key]: value for key, value in cache.get_many(keys).items()
+    }
+    missing = post_ids - set(result)
+    if missing:
+        counted = dict.fromkeys(missing, 0)
+        counted.update(
+            ReactionCounter.objects.filter(post_id__in=missing)
+            .values_list('post_id')
+            .annotate(total=Sum('count'))
+            .values_list('post_id', 'total')
+        )
+        cache.set_many(
+            {
+                _cache_key(post_id, versions[post_id]): total
+                for post_id, total in counted.items()
+            },
+            CACHE_TIME,
+        )
+        result.update(counted)
+    return result
+
+
+def compact(recount=False):
+    """Сводит части счётчика каждого поста в одну строку.
+
+    Каждый пост — отдельная короткая транзакция. С recount сумма
+    берётся из таблицы отметок, а не из частей: так исправляются
+    расхождения, если части правили вручную. Возвращает число постов.
+    """
+    if recount:
+        post_ids = set(
+            Reaction.objects.values_list('post_id', flat=True).distinct()
+        ) | set(
+            ReactionCounter.objects.values_list('post_id', flat=True)
+        )
+    else:
+        post_ids = ReactionCounter.objects.values_list(
+            'post_id'
+        ).annotate(parts=Count('id')).filter(parts__gt=1).values_list(
+            'post_id', flat=True
+        )
+    compacted = 0
+    for post_id in list(post_ids):
+        with transaction.atomic():
+            if recount:
+                total = Reaction.objects.filter(post_id=post_id).count()
+            else:
+                total = ReactionCounter.objects.filter(
+                    post_id=post_id
+                ).aggregate(total=Sum('count'))['total'] or 0
+            ReactionCounter.objects.filter(post_id=post_id).delete()
+            ReactionCounter.objects.create(
+                post_id=post_id, shard=0, count=total
+            )
+        _changed(post_id)
+        compacted += 1
+    return compacted
@@ -0,0 +1,162 @@
+import heapq
+import math
+from array import array
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Follow, FollowGraphChange, Recommendation
+
+TOP_K = 10
+BATCH_SIZE = 500
+HUB_LIMIT = 1000
+
+
+class Adjacency:
+    """Список смежности в формате CSR на массивах array.
+
+    Для каждой вершины хранится срез indices[indptr[i]:indptr[i + 1]]
+    отсортированных соседей — примерно 8 байт на ребро вместо
+    словаря множеств.
+    """
+
+    def __init__(self, pairs):
+        self.index = {}
+        self.nodes = array('q')
+        self.indptr = array('q', [0])
+        self.indices = array('q')
+        current = None
+        for node, neighbour in pairs:
+            if node != current:
+                if current is not None:
+                    self.indptr.append(len(self.indices))
+                self.index[node] = len(self.nodes)
+                self.nodes.append(node)
+                current = node
+            self.indices.append(neighbour)
+        if current is not None:
+            self.indptr.append(len(self.indices))
+
+    def neighbours(self, node):
+        row = self.index.get(node)
+        if row is None:
+            return self.indices[0:0]
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def degree(self, node):
+        return len(self.neighbours(node))
+
+
+class FollowGraph:
+    def __init__(self):
+        self.following = Adjacency(
+            Follow.objects.order_by('user_id', 'author_id').values_list(
+                'user_id', 'author_id'
+            ).iterator()
+        )
+        self.followers = Adjacency(
+            Follow.objects.order_by('author_id', 'user_id').values_list(
+                'author_id', 'user_id'
+            ).iterator()
+        )
+
+    def users(self):
+        return self.following.nodes
+
+    def scores(self, user_id, top_k=TOP_K):
+        """Топ авторов по совместным подпискам.
+
+        Пользователи с общими подписками голосуют за своих авторов
+        весом, равным числу общих авторов, делённому на корень из
+        числа их подписок, чтобы «подписанные на всех» не
+        перевешивали остальных.
+        """
+        followed = self.following.neighbours(user_id)
+        overlap = defaultdict(int)
+        for author_id in followed:
+            for other_id in self.followers.neighbours(author_id)[:HUB_LIMIT]:
+                if other_id != user_id:
+                    overlap[other_id] += 1
+        excluded = set(followed)
+        excluded.add(user_id)
+        scores = defaultdict(float)
+        for other_id, common in overlap.items():
+            their = self.following.neighbours(other_id)
+            weight = common / math.sqrt(len(their))
+            for author_id in their:
+                if author_id not in excluded:
+                    scores[author_id] += weight
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def affected_by(self, changes):
+        """Пользователи, чьё окружение задели изменения подписок."""
+        affected = set()
+        for user_id, author_id in changes:
+            affected.add(user_id)
+            authors = set(self.following.neighbours(user_id))
+            authors.add(author_id)
+            for author in authors:
+                affected.update(self.followers.neighbours(author))
+        return affected
+
+
+def store(graph, user_ids, top_k=TOP_K):
+    rows = []
+    for user_id in user_ids:
+        rows.extend(
+            Recommendation(user_id=user_id, author_id=author_id, score=score)
+            for author_id, score in graph.scores(user_id, top_k)
+        )
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        Recommendation.objects.bulk_create(rows)
+    return len(rows)
+
+
+def store_in_batches(graph, user_ids, top_k, batch_size):
+    user_ids = sorted(user_ids)
+    stored = 0
+    for start in range(0, len(user_ids), batch_size):
+        stored += store(graph, user_ids[start:start + batch_size], top_k)
+    return len(user_ids), stored
+
+
+def last_change_id():
+    return FollowGraphChange.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first()
+
+
+def rebuild(top_k=TOP_K, batch_size=BATCH_SIZE):
+    """Пересчитывает рекомендации всех пользователей.
+
+    Рекомендации тех, у кого подписок не осталось, удаляются,
+    а журнал изменений очищается: полный пересчёт их уже учёл.
+    """
+    last_id = last_change_id()
+    graph = FollowGraph()
+    Recommendation.objects.exclude(
+        user_id__in=Follow.objects.values('user_id')
+    ).delete()
+    result = store_in_batches(graph, graph.users(), top_k, batch_size)
+    if last_id is not None:
+        FollowGraphChange.objects.filter(id__lte=last_id).delete()
+    return result
+
+
+def refresh(top_k=TOP_K, batch_size=BATCH_SIZE):
+    """Пересчитывает только пользователей, затронутых изменениями."""
+    changes = list(
+        FollowGraphChange.objects.order_by('id').values_list(
+            'id', 'user_id', 'author_id'
+        )
+    )
+    if not changes:
+        return 0, 0
+    graph = FollowGraph()
+    affected = graph.affected_by(
+        (user_id, author_id) for _, user_id, author_id in changes
+    )
+    result = store_in_batches(graph, affected, top_k, batch_size)
+    FollowGraphChange.objects.filter(id__lte=changes[-1][0]).delete()
+    return result
@@ -0,0 +1,75 @@
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'posts_post_fts'
+SCHEMA = {
+    FTS_TABLE: (
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "text, content='posts_post', content_rowid='id')"
+    ),
+    f'{FTS_TABLE}_ai': (
+        f'CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON posts_post BEGIN '
+        f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+        'END'
+    ),
+    f'{FTS_TABLE}_ad': (
+        f'CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON posts_post BEGIN '
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+        "VALUES ('delete', old.id, old.text); "
+        'END'
+    ),
+    f'{FTS_TABLE}_au': (
+        f'CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF text ON posts_post '
+        f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+        "VALUES ('delete', old.id, old.text); "
+        f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+        'END'
+    ),
+}
+
+
+def is_supported(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def ensure_index(using='default', **kwargs):
+    """Создаёт полнотекстовый индекс постов и триггеры, если их нет.
+
+    Вызывается после каждого migrate: SQLite-бэкенд Django при
+    изменении схемы пересоздаёт таблицу posts_post, и триггеры
+    теряются. Если чего-то не хватало, индекс перестраивается.
+    """
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT name FROM sqlite_master '
+            'WHERE name IN (%s, %s, %s, %s, %s)',
+            ['posts_post', *SCHEMA],
+        )
+        existing = {name for name, in cursor.fetchall()}
+        if 'posts_post' not in existing:
+            return
+        missing = [name for name in SCHEMA if name not in existing]
+        for name in missing:
+            cursor.execute(SCHEMA[name])
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+
+
+def match_expression(term):
+    """Превращает строку поиска в запрос FTS5 по префиксам слов."""
+    words = re.findall(r'\w+', term)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def matching_ids(term):
+    """Подзапрос id постов, найденных по индексу, а не через LIKE."""
+    return RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match_expression(term),),
+    )
@@ -0,0 +1,172 @@
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from core.storage import acquired, forget_acquired, release_on_commit
+
+from . import (
+    autocomplete, follows, groups, notifications, snapshots, threads,
+    trending
+)
+from .models import Comment, Follow, FollowGraphChange, Group, Post, User
+
+UNKNOWN = object()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    follows.invalidate(instance.user_id)
+    FollowGraphChange.objects.create(
+        user_id=instance.user_id, author_id=instance.author_id
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_trending_score(sender, instance, created, raw, **kwargs):
+    # После сохранения: pub_date с auto_now_add заполняется уже после
+    # pre_save, а оценка должна совпадать с той, что даст rebuild().
+    if created and not raw and not instance.trending_score:
+        instance.trending_score = trending.initial_score(instance.pub_date)
+        Post.objects.filter(pk=instance.pk).update(
+            trending_score=instance.trending_score
+        )
+
+
+@receiver(pre_save, sender=Comment)
+def comment_depth(sender, instance, raw, **kwargs):
+    if instance._state.adding and not raw:
+        threads.place(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        threads.assign_path(instance)
+        trending.bump(instance.post_id, at=instance.created)
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # Поле могло быть отложено через only()/defer(): тогда старую
+    # группу мы не знаем и при сохранении пересчитаем её целиком.
+    instance._saved_group_id = instance.__dict__.get('group_id', UNKNOWN)
+    image = instance.__dict__.get('image', UNKNOWN)
+    instance._saved_image = getattr(image, 'name', image)
+
+
+@receiver(pre_save, sender=Post)
+def post_image_replaced(sender, instance, raw, **kwargs):
+    # Новая картинка получит свою ссылку при сохранении файла,
+    # ссылку старой снимаем после фиксации транзакции. Загрузка того
+    # же содержимого даёт то же имя, но и новую ссылку.
+    old = instance._saved_image
+    if raw or instance._state.adding or old is UNKNOWN or not old:
+        return
+    image = instance.image
+    if (
+        image.name != old
+        or not image._committed
+        or acquired(instance, 'image')
+    ):
+        release_on_commit([old])
+
+
+@receiver(post_save, sender=Post)
+def post_image_saved(sender, instance, **kwargs):
+    instance._saved_image = instance.image.name
+    forget_acquired(instance, 'image')
+
+
+@receiver(post_save, sender=Post)
+def post_group_stats(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old = None if created else instance._saved_group_id
+    new = instance.group_id
+    instance._saved_group_id = new
+    feed_changed(old, new)
+    if old is UNKNOWN:
+        groups.recount([new])
+        return
+    groups.post_moved(old, new, instance.pub_date)
+
+
+@receiver(post_save, sender=Post)
+def post_notify_followers(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        notifications.post_created(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    # Массовые операции сбрасывают счётчики сами, одним запросом
+    # на пачку.
+    if not groups.deferring():
+        notifications.posts_removed([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    release_on_commit([instance.image.name])
+    feed_changed(instance.group_id)
+    if instance.group_id is not None:
+        groups.post_removed(instance.group_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    groups.bump_version()
+    groups.bump_version(groups.LIST_VERSION_KEY)
+
+
+def feed_changed(*group_ids):
+    # Массовые операции перестраивают снимки один раз в конце.
+    if not groups.deferring():
+        snapshots.schedule(group_ids)
+
+
+@receiver(post_save, sender=Group)
+def group_snapshot(sender, instance, raw, **kwargs):
+    if not raw:
+        feed_changed(instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+def group_snapshot_deleted(sender, instance, **kwargs):
+    if snapshots.enabled():
+        snapshots.remove_group(instance.slug)
+    feed_changed()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    if instance.is_active:
+        autocomplete.changed(
+            *autocomplete.author_entry(instance.pk, instance.username)
+        )
+    else:
+        autocomplete.changed((autocomplete.AUTHOR, instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    autocomplete.changed((autocomplete.AUTHOR, instance.pk))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    autocomplete.changed(*autocomplete.group_entry(
+        instance.pk, instance.title, instance.slug
+    ))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    autocomplete.changed((autocomplete.GROUP, instance.pk))
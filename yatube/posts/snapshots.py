@@ -0,0 +1,229 @@
+import inspect
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve, reverse
+
+from tasks.decorators import task
+from tasks.models import Task
+
+from .models import Group, Post
+from .paginators import NUMBER_OF_POSTS
+
+PAGES = 3
+INDEX_FILE = 'index.html'
+PAGE_FILE = 'page-{}.html'
+_SLUG = re.compile(r'^[-\w]+$')
+_GROUP_PATH = re.compile(r'^/group/([-\w]+)/$')
+
+
+def enabled():
+    return getattr(settings, 'SNAPSHOTS_ENABLED', False)
+
+
+def directory():
+    return getattr(settings, 'SNAPSHOT_DIR', None) or os.path.join(
+        settings.BASE_DIR, 'snapshots'
+    )
+
+
+def pages():
+    return getattr(settings, 'SNAPSHOT_PAGES', PAGES)
+
+
+def file_path(url_path, page=1):
+    """Файл снимка для страницы ленты.
+
+    Каталог повторяет адреса сайта: /group/cats/?page=2 лежит
+    в group/cats/page-2.html, поэтому обратный прокси может отдавать
+    снимки сам, без обращения к приложению.
+    """
+    name = INDEX_FILE if page == 1 else PAGE_FILE.format(page)
+    return os.path.join(directory(), url_path.strip('/'), name)
+
+
+def lookup(path, query):
+    """Снимок для GET-запроса или None, если его быть не может."""
+    if path != reverse('posts:index') and not _GROUP_PATH.match(path):
+        return None
+    if not query:
+        page = 1
+    elif query.startswith('page=') and query[5:].isdigit():
+        page = int(query[5:])
+    else:
+        return None
+    if not 1 <= page <= pages():
+        return None
+    return file_path(path, page)
+
+
+def write_atomic(path, content):
+    """Записывает файл так, что читатель видит либо старый, либо новый."""
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=folder, suffix='.part')
+    try:
+        with os.fdopen(descriptor, 'wb') as target:
+            target.write(content)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def anonymous_request(path, page):
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.GET = QueryDict(f'page={page}')
+    request.META = {
+        'SERVER_NAME': settings.ALLOWED_HOSTS[0],
+        'SERVER_PORT': '80',
+    }
+    request.user = AnonymousUser()
+    request.resolver_match = resolve(path)
+    return request
+
+
+def render_page(path, page):
+    request = anonymous_request(path, page)
+    view = request.resolver_match.func
+    # У index есть cache_page: снимок должен строиться по базе,
+    # а не по закешированной до изменения странице. Без обёрток
+    # и шапка выводится сразу, без заглушек для middleware.
+    view = inspect.unwrap(view)
+    response = view(request, **request.resolver_match.kwargs)
+    return response.content
+
+
+def build(path, total_pages):
+    """Перестраивает первые страницы ленты и убирает лишние."""
+    for page in range(1, pages() + 1):
+        target = file_path(path, page)
+        if page > max(total_pages, 1):
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        write_atomic(target, render_page(path, page))
+
+
+def page_count(posts):
+    return -(-posts.count() // NUMBER_OF_POSTS)
+
+
+def build_index():
+    build(reverse('posts:index'), page_count(Post.objects.all()))
+
+
+def build_group(group):
+    build(
+        reverse('posts:group_list', args=[group.slug]),
+        page_count(group.posts.all()),
+    )
+
+
+def remove_group(slug):
+    if _SLUG.match(slug):
+        shutil.rmtree(
+            os.path.dirname(file_path(reverse(
+                'posts:group_list', args=[slug]
+            ))),
+            ignore_errors=True,
+        )
+
+
+def build_all():
+    """Полная сборка: главная, все группы и удаление лишних каталогов."""
+    build_index()
+    slugs = set()
+    for group in Group.objects.all():
+        build_group(group)
+        slugs.add(group.slug)
+    group_root = os.path.join(directory(), 'group')
+    if os.path.isdir(group_root):
+        for entry in os.scandir(group_root):
+            if entry.name not in slugs:
+                remove_group(entry.name)
+
+
+@task(priority=5)
+def rebuild(group_ids):
+    """Перестраивает главную и ленты перечисленных групп."""
+    build_index()
+    for group in Group.objects.filter(pk__in=group_ids):
+        build_group(group)
+
+
+def schedule(group_ids):
+    """Ставит перестройку после фиксации транзакции.
+
+    Пока такая же задача ждёт в очереди, вторую не ставим: серия
+    правок одной группы даёт одну перестройку.
+    """
+    if not enabled():
+        return
+    # None — пост без группы; не-int — группа, которую сигнал не знает.
+    group_ids = sorted({pk for pk in group_ids if isinstance(pk, int)})
+
+    def enqueue():
+        if not Task.objects.filter(
+            name=rebuild.name,
+            status=Task.QUEUED,
+            payload=json.dumps({'args': [group_ids], 'kwargs': {}}),
+        ).exists():
+            rebuild.delay(group_ids)
+
+    transaction.on_commit(enqueue)
+
+
+class SnapshotApplication:
+    """WSGI-обёртка, отдающая снимки анонимным GET-запросам.
+
+    Запрос с кукой сессии или сообщений идёт в Django: у такого
+    посетителя страница может отличаться от снимка.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.cookies = (
+            settings.SESSION_COOKIE_NAME,
+            getattr(settings, 'MESSAGE_COOKIE_NAME', 'messages'),
+        )
+
+    def snapshot(self, environ):
+        if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+            return None
+        cookie = environ.get('HTTP_COOKIE', '')
+        if any(f'{name}=' in cookie for name in self.cookies):
+            return None
+        return lookup(
+            environ.get('PATH_INFO', ''), environ.get('QUERY_STRING', '')
+        )
+
+    def __call__(self, environ, start_response):
+        path = self.snapshot(environ) if enabled() else None
+        if path is not None:
+            try:
+                with open(path, 'rb') as source:
+                    content = source.read()
+            except FileNotFoundError:
+                pass
+            else:
+                start_response('200 OK', [
+                    ('Content-Type', 'text/html; charset=utf-8'),
+                    ('Content-Length', str(len(content))),
+                    ('X-Frame-Options', 'SAMEORIGIN'),
+                    ('X-Snapshot', 'hit'),
+                ])
+                if environ['REQUEST_METHOD'] == 'HEAD':
+                    return [b'']
+                return [content]
+        return self.application(environ, start_response)
@@ -0,0 +1,17 @@
+from tasks.decorators import task
+
+from .models import Post
+
+THUMBNAIL_GEOMETRY = '960x339'
+
+
+@task()
+def warm_thumbnails(post_id):
+    """Заранее готовит миниатюру, которую покажут шаблоны ленты."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    # sorl-thumbnail с движком Pillow нужен только воркеру задач.
+    from sorl.thumbnail import get_thumbnail
+
+    get_thumbnail(post.image, THUMBNAIL_GEOMETRY, crop='center', upscale=True)
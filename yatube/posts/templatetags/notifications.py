@@ -0,0 +1,11 @@
+from django import template
+
+from posts.notifications import unread_count
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def unread_notifications(context):
+    """Число непрочитанных уведомлений посетителя из кеша."""
+    return unread_count(context['user'])
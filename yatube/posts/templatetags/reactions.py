@@ -0,0 +1,25 @@
+from django import template
+
+from posts import reactions
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def likes(context, post):
+    """Число отметок поста.
+
+    Для страницы ленты суммы всех её постов берутся разом при первом
+    вызове и запоминаются на запросе: pub.html подключается на каждый
+    пост, и у каждого подключения свой render_context.
+    """
+    request = context.get('request')
+    cached = getattr(request, '_reaction_totals', None) or {}
+    if post.pk not in cached:
+        post_ids = {post.pk}
+        page = context.get('page_obj') or context.get('posts') or ()
+        post_ids.update(item.pk for item in page)
+        cached.update(reactions.totals(post_ids))
+        if request is not None:
+            request._reaction_totals = cached
+    return cached[post.pk]
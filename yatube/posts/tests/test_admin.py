@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import admin
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {i}', slug=f'group-{i}', description='Описание'
+            )
+            for i in range(3)
+        ]
+        cls.changelist_url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def create_posts(self, count):
+        for number in range(count):
+            Post.objects.create(
+                text=f'Пост номер {number}',
+                author=self.admin,
+                group=self.groups[number % 3],
+            )
+
+    def changelist_queries(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.changelist_url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк."""
+        self.create_posts(3)
+        # Сессия и пользователь тоже лежат в кеше: оба замера делаются
+        # с пустым кешем.
+        cache.clear()
+        few = self.changelist_queries()
+        self.create_posts(30)
+        cache.clear()
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_group_choices_survive_post_writes(self):
+        """Варианты групп не сбрасываются записью постов."""
+        admin.group_choices()
+        self.create_posts(3)
+        with self.assertNumQueries(0):
+            admin.group_choices()
+        Group.objects.create(title='Новая', slug='new', description='')
+        self.assertIn('Новая', dict(admin.group_choices()).values())
+
+    def test_count_is_cached(self):
+        """Повторное открытие списка не выполняет COUNT(*)."""
+        self.create_posts(3)
+        self.changelist_queries()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.changelist_url)
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'COUNT(*)' in query['sql']
+        ])
+
+    def test_search_uses_fulltext_index(self):
+        """Поиск идёт через полнотекстовый индекс и видит правки."""
+        post = Post.objects.create(
+            text='Рыжая лиса прыгает', author=self.admin
+        )
+        Post.objects.create(text='Серый волк', author=self.admin)
+        response = self.client.get(self.changelist_url, {'q': 'рыж'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+        self.assertNotIn(
+            'LIKE', str(response.context['cl'].queryset.query)
+        )
+        post.text = 'Белый медведь'
+        post.save()
+        response = self.client.get(self.changelist_url, {'q': 'рыж'})
+        self.assertEqual(list(response.context['cl'].result_list), [])
+        response = self.client.get(self.changelist_url, {'q': 'медв'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
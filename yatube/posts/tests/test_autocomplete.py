@@ -0,0 +1,98 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import autocomplete
+from ..models import Group
+
+User = get_user_model()
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User.objects.create_user(username='Leonid')
+        User.objects.create_user(username='lena')
+        User.objects.create_user(username='boris')
+        Group.objects.create(
+            title='Лето', slug='summer', description='Описание'
+        )
+
+    def setUp(self):
+        self.leo = User.objects.get(username='Leonid')
+        self.group = Group.objects.get(slug='summer')
+        autocomplete.index.build()
+        patcher = mock.patch.object(
+            autocomplete.transaction, 'on_commit', side_effect=lambda f: f()
+        )
+        self.on_commit = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def labels(self, prefix):
+        return [item['label'] for item in autocomplete.search(prefix)]
+
+    def test_prefix_search(self):
+        """Поиск по префиксу без учёта регистра, по имени и слагу."""
+        self.assertEqual(self.labels('le'), ['lena', 'Leonid'])
+        self.assertEqual(self.labels('ЛЕ'), ['Лето'])
+        self.assertEqual(self.labels('sum'), ['Лето'])
+        self.assertEqual(self.labels('x'), [])
+
+    def test_index_updates_incrementally(self):
+        """Изменения пользователей и групп попадают в индекс сразу."""
+        built_at = autocomplete.index.built_at
+        self.leo.username = 'Lev'
+        self.leo.save()
+        self.group.delete()
+        User.objects.create_user(username='letov')
+        self.assertEqual(self.labels('le'), ['lena', 'letov', 'Lev'])
+        self.assertEqual(self.labels('sum'), [])
+        self.assertEqual(autocomplete.index.built_at, built_at)
+
+    def test_inactive_users_are_hidden(self):
+        self.leo.is_active = False
+        self.leo.save()
+        self.assertEqual(self.labels('leo'), [])
+
+    def test_rolled_back_rename_is_not_indexed(self):
+        self.on_commit.side_effect = None
+        with transaction.atomic():
+            self.leo.username = 'Lev'
+            self.leo.save()
+        self.assertEqual(self.labels('lev'), [])
+        self.assertEqual(self.labels('leo'), ['Leonid'])
+
+    def test_fixtures_do_not_touch_index(self):
+        self.group.title = 'Осень'
+        data = serializers.serialize('json', [self.group])
+        for item in serializers.deserialize('json', data):
+            item.save()
+        self.assertEqual(self.labels('осе'), [])
+
+    def test_endpoint_does_not_query_database(self):
+        """Ответ строится из памяти, без запросов к базе."""
+        url = reverse('posts:autocomplete')
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'q': 'bor'})
+        self.assertEqual(
+            response.json()['results'],
+            [{
+                'type': 'author',
+                'label': 'boris',
+                'url': reverse('posts:profile', args=('boris',)),
+            }],
+        )
+        self.assertEqual(self.client.get(url).json(), {'results': []})
+
+    def test_search_latency(self):
+        """Поиск по индексу занимает меньше миллисекунды."""
+        started = time.perf_counter()
+        for _ in range(1000):
+            autocomplete.search('le')
+        self.assertLess((time.perf_counter() - started) / 1000, 1e-3)
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.admin import helpers
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from tasks.models import Task
+from tasks.worker import run_pending
+
+from .. import bulk
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@mock.patch.object(bulk, 'CHUNK_SIZE', 2)
+class BulkActionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.source = Group.objects.create(
+            title='Откуда', slug='source', description='Описание'
+        )
+        cls.target = Group.objects.create(
+            title='Куда', slug='target', description='Описание'
+        )
+        cls.changelist_url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=self.admin, group=self.source,
+                image='posts/picture.gif',
+            )
+            for i in range(5)
+        ]
+        for post in self.posts:
+            Comment.objects.create(post=post, author=self.admin, text='Ого')
+
+    def act(self, action, **data):
+        return self.client.post(self.changelist_url, {
+            'action': action,
+            'index': 0,
+            helpers.ACTION_CHECKBOX_NAME: [post.pk for post in self.posts],
+            **data,
+        }, follow=True)
+
+    def test_run_reports_progress_per_chunk(self):
+        progress = []
+        bulk.run(
+            bulk.MOVE, [post.pk for post in self.posts], self.target.pk,
+            progress=lambda done, total: progress.append((done, total)),
+        )
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+
+    def test_move_to_group_updates_counters(self):
+        """Перенос меняет группу постов и пересчитывает счётчики."""
+        response = self.act('move_to_group', group=self.target.pk)
+        self.assertContains(response, 'Обработано постов: 5, пачек: 3.')
+        self.assertEqual(self.target.posts.count(), 5)
+        self.source.refresh_from_db()
+        self.target.refresh_from_db()
+        self.assertEqual(self.source.posts_count, 0)
+        self.assertEqual(self.target.posts_count, 5)
+
+    def test_delete_requires_confirmation(self):
+        """Удаление сначала спрашивает подтверждение."""
+        response = self.act('delete_posts')
+        self.assertTemplateUsed(response, 'admin/posts/post/bulk_delete.html')
+        self.assertContains(
+            response,
+            f'href="{self.changelist_url}" class="button cancel-link"',
+        )
+        self.assertEqual(Post.objects.count(), 5)
+        self.act('delete_posts', confirm='yes')
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.posts_count, 0)
+
+    def test_clear_images(self):
+        self.act('clear_images')
+        self.assertFalse(Post.objects.exclude(image='').exists())
+
+    @mock.patch.object(bulk, 'BACKGROUND_THRESHOLD', 3)
+    def test_large_selection_runs_in_background(self):
+        """Большие выборки обрабатываются фоновой задачей."""
+        response = self.act('move_to_group', group=self.target.pk)
+        self.assertContains(response, 'поставлена в очередь')
+        self.assertEqual(self.target.posts.count(), 0)
+        self.assertEqual(Task.objects.count(), 1)
+        run_pending()
+        self.assertEqual(self.target.posts.count(), 5)
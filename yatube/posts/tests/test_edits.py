@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostEditTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other', description='Описание'
+        )
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            text='Старый текст',
+            author=self.user,
+            group=self.group,
+            image='posts/picture.gif',
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:post_edit', args=(self.post.id,))
+
+    def edit(self, **data):
+        payload = {
+            'text': self.post.text,
+            'group': self.post.group_id,
+            'version': self.post.version,
+            **data,
+        }
+        return self.client.post(self.url, payload)
+
+    def updates(self, **data):
+        """Отправляет правку и возвращает выполненные UPDATE поста."""
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            if sql.startswith('UPDATE "posts_post"'):
+                statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            self.response = self.edit(**data)
+        return statements
+
+    def test_only_changed_fields_are_written(self):
+        """В UPDATE попадают только изменённые поля и версия."""
+        updates = self.updates(text='Новый текст')
+        self.assertRedirects(
+            self.response,
+            reverse('posts:post_detail', args=(self.post.id,)),
+        )
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"text"', updates[0])
+        self.assertNotIn('"image"', updates[0])
+        self.assertNotIn('"group_id"', updates[0])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Новый текст')
+        self.assertEqual(self.post.version, 1)
+        self.assertEqual(self.post.image, 'posts/picture.gif')
+
+    def test_unchanged_form_does_not_write(self):
+        self.assertEqual(self.updates(), [])
+
+    def test_stale_edit_is_rejected(self):
+        """Правка по устаревшей версии не перетирает чужую."""
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Чужая правка', version=1
+        )
+        response = self.edit(text='Моя правка')
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertTrue(response.context['form'].non_field_errors())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Чужая правка')
+
+    def test_group_change_updates_counters(self):
+        self.edit(group=self.other_group.pk)
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..follows import is_following
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FollowStateTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(5)
+        ]
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+        Follow.objects.create(user=cls.user, author=cls.authors[3])
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for author in cls.authors:
+            Post.objects.create(
+                text='Текст поста', author=author, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_bulk_lookup_uses_one_query(self):
+        """Подписки на всех авторов проверяются одним запросом,
+        повторная проверка берёт их из кеша."""
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            state = is_following(user, self.authors)
+        self.assertEqual(
+            [state[author.pk] for author in self.authors],
+            [True, False, False, True, False],
+        )
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            is_following(user, self.authors)
+
+    def test_cache_invalidated_on_follow_and_unfollow(self):
+        """Подписка и отписка сбрасывают кеш пользователя."""
+        author = self.authors[1]
+        self.assertFalse(is_following(self.fresh_user(), [author])[author.pk])
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=(author.username,))
+        )
+        self.assertTrue(is_following(self.fresh_user(), [author])[author.pk])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=(author.username,))
+        )
+        self.assertFalse(is_following(self.fresh_user(), [author])[author.pk])
+
+    def test_unfollow_keeps_other_subscriptions(self):
+        """Отписка не удаляет подписки других пользователей."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=other, author=self.authors[0])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=(self.authors[0],))
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=other, author=self.authors[0]).exists()
+        )
+
+    def test_profile_context_has_following(self):
+        """Профиль знает, подписан ли на автора текущий пользователь."""
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=(self.authors[0].username,))
+        )
+        self.assertIs(response.context['following'], True)
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=(self.authors[1].username,))
+        )
+        self.assertIs(response.context['following'], False)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_per_process_cache_is_not_used(self):
+        """Без общего кеша подписки читаются из базы: отписка в другом
+        процессе не оставит здесь устаревшего состояния."""
+        is_following(self.fresh_user(), self.authors)
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            is_following(user, self.authors)
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -65,7 +66,10 @@ class PostFormTests(TestCase):
         post = Post.objects.last()
         self.assertEqual(post.author, self.user)
         self.assertEqual(post.text, form_data['text'])
-        self.assertEqual(post.image, 'posts/small.gif')
+        digest = hashlib.sha256(self.small_gif).hexdigest()
+        self.assertEqual(
+            post.image, f'posts/{digest[:2]}/{digest[2:4]}/{digest}.gif'
+        )
         self.assertEqual(post.group, self.group)
         self.assertEqual(self.group.posts.count(), 1)
         self.assertEqual(create_response.status_code, HTTPStatus.OK)
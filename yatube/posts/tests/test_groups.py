@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import groups
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.first = Group.objects.create(
+            title='Первая', slug='first', description='Описание'
+        )
+        cls.second = Group.objects.create(
+            title='Вторая', slug='second', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertStats(self, group, count, last_post):
+        group.refresh_from_db()
+        self.assertEqual(group.posts_count, count)
+        self.assertEqual(
+            group.last_post_at, last_post.pub_date if last_post else None
+        )
+
+    def test_counters_follow_post_lifecycle(self):
+        """Счётчики групп поддерживаются при создании, переносе
+        и удалении постов."""
+        older = Post.objects.create(
+            text='Пост', author=self.user, group=self.first
+        )
+        newer = Post.objects.create(
+            text='Пост', author=self.user, group=self.first
+        )
+        self.assertStats(self.first, 2, newer)
+        newer.group = self.second
+        newer.save()
+        self.assertStats(self.first, 1, older)
+        self.assertStats(self.second, 1, newer)
+        older.delete()
+        self.assertStats(self.first, 0, None)
+
+    def test_recount_after_bulk_update(self):
+        """recount чинит счётчики после update() без сигналов."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.first
+        )
+        Post.objects.update(group=self.second)
+        groups.recount([self.first.pk, self.second.pk])
+        self.assertStats(self.first, 0, None)
+        self.assertStats(self.second, 1, post)
+
+    def test_directory_is_cached_and_invalidated(self):
+        """Каталог отдаётся из кеша и сбрасывается новым постом."""
+        url = reverse('posts:group_index')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        Post.objects.create(text='Пост', author=self.user, group=self.first)
+        response = self.client.get(url)
+        counts = {
+            group.slug: group.posts_count
+            for group in response.context['groups']
+        }
+        self.assertEqual(counts, {'first': 1, 'second': 0})
+
+    def test_directory_keyset_pagination(self):
+        """Каталог листается по ключу без повторов."""
+        for number in range(groups.GROUPS_PER_PAGE):
+            Group.objects.create(
+                title=f'Группа {number:02}',
+                slug=f'group-{number}',
+                description='Описание',
+            )
+        response = self.client.get(reverse('posts:group_index'))
+        first = response.context['groups']
+        response = self.client.get(
+            reverse('posts:group_index'),
+            {'after': response.context['next_after']},
+        )
+        second = response.context['groups']
+        self.assertEqual(len(first), groups.GROUPS_PER_PAGE)
+        self.assertEqual(len(second), 2)
+        self.assertIsNone(response.context['next_after'])
+        self.assertEqual(
+            [group.title for group in first + second],
+            list(Group.objects.order_by('title').values_list(
+                'title', flat=True
+            )),
+        )
@@ -0,0 +1,166 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import fragments
+from tasks.models import Task
+from tasks.worker import run_pending
+
+from .. import bulk, notifications
+from ..models import Follow, Notification, Post
+
+User = get_user_model()
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(username=f'follower{number}')
+            for number in range(5)
+        ]
+        for user in cls.followers:
+            Follow.objects.create(user=user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(
+            notifications.transaction, 'on_commit', side_effect=lambda f: f()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def create_post(self, text='Новый пост'):
+        self.author_client.post(reverse('posts:post_create'), {'text': text})
+        return Post.objects.get(text=text)
+
+    def test_post_create_only_enqueues_fan_out(self):
+        self.create_post()
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(
+            Task.objects.filter(name=notifications.fan_out.name).count(), 1
+        )
+
+    def test_post_create_cost_does_not_depend_on_followers(self):
+        def queries(text):
+            with CaptureQueriesContext(connection) as context:
+                self.create_post(text)
+            return len(context.captured_queries)
+
+        # Первый запрос ещё заполняет кеш пользователя и часы рейтинга.
+        self.create_post('Разогрев')
+        few = queries('Первый')
+        for number in range(20):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f'extra{number}'),
+                author=self.author,
+            )
+        self.assertEqual(queries('Второй'), few)
+
+    def test_no_task_without_followers(self):
+        Post.objects.create(text='Пост', author=self.followers[0])
+        self.assertFalse(Task.objects.exists())
+
+    @mock.patch.object(notifications, 'CHUNK_SIZE', 2)
+    @mock.patch.object(notifications, 'CHUNKS_PER_RUN', 1)
+    def test_fan_out_continues_in_chunks(self):
+        post = self.create_post()
+        run_pending()
+        # 5 подписчиков по 2 в пачке: три запуска задачи.
+        self.assertEqual(
+            Task.objects.filter(
+                name=notifications.fan_out.name, status=Task.DONE
+            ).count(),
+            3,
+        )
+        self.assertEqual(
+            set(Notification.objects.values_list('user_id', 'post_id')),
+            {(user.pk, post.pk) for user in self.followers},
+        )
+
+    def test_unread_count_in_header_and_inbox_marks_read(self):
+        reader = self.followers[0]
+        client = Client()
+        client.force_login(reader)
+        self.assertNotContains(client.get(reverse('posts:index')), '(1)')
+        post = self.create_post('Свежая запись')
+        notifications.fan_out(post.pk)
+        self.assertContains(
+            client.get(reverse('posts:index')), 'Уведомления (1)'
+        )
+        inbox = client.get(reverse('posts:notifications'))
+        self.assertContains(inbox, 'Свежая запись')
+        self.assertContains(inbox, 'новое')
+        self.assertEqual(notifications.unread_count(reader), 0)
+        self.assertNotContains(client.get(reverse('posts:index')), '(1)')
+
+    def test_deleting_post_resets_unread_count(self):
+        reader = self.followers[0]
+        post = self.create_post()
+        notifications.fan_out(post.pk)
+        self.assertEqual(notifications.unread_count(reader), 1)
+        post.delete()
+        self.assertEqual(notifications.unread_count(reader), 0)
+
+    def test_bulk_delete_resets_unread_count(self):
+        reader = self.followers[0]
+        post = self.create_post()
+        notifications.fan_out(post.pk)
+        self.assertEqual(notifications.unread_count(reader), 1)
+        bulk.run(bulk.DELETE, [post.pk])
+        self.assertEqual(notifications.unread_count(reader), 0)
+
+    @override_settings(UNREAD_CACHE_ENABLED=True)
+    def test_unread_count_is_cached(self):
+        reader = self.followers[0]
+        notifications.unread_count(reader)
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(reader), 0)
+
+    def test_count_is_fresh_when_worker_has_own_cache(self):
+        """Рассылка в воркере сбрасывает только его LocMemCache: без
+        общего кеша счётчик и шапка в веб-процессе всё равно свежие."""
+        reader = self.followers[0]
+        client = Client()
+        client.force_login(reader)
+        self.assertEqual(notifications.unread_count(reader), 0)
+        self.assertNotContains(client.get(reverse('posts:index')), '(1)')
+        post = self.create_post()
+        worker_cache = LocMemCache('worker', {})
+        with mock.patch.object(notifications, 'cache', worker_cache), \
+                mock.patch.object(fragments, 'cache', worker_cache):
+            notifications.fan_out(post.pk)
+        self.assertEqual(notifications.unread_count(reader), 1)
+        self.assertContains(
+            client.get(reverse('posts:index')), 'Уведомления (1)'
+        )
+
+    def test_inbox_pages_by_id(self):
+        reader = self.followers[0]
+        posts = [
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+            for number in range(5)
+        ]
+        Notification.objects.bulk_create(
+            Notification(user=reader, post=post) for post in posts
+        )
+        seen = []
+        before = None
+        while True:
+            page, before = notifications.inbox_page(reader, before, size=2)
+            seen += [item.post.text for item in page]
+            if before is None:
+                break
+        self.assertEqual(
+            seen, [f'Пост {number}' for number in range(4, -1, -1)]
+        )
@@ -0,0 +1,146 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from users import deletion
+
+from .. import reactions
+from ..models import Post, Reaction, ReactionCounter
+
+User = get_user_model()
+
+
+@override_settings(REACTION_SHARDS=4)
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.users = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(10)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        patcher = mock.patch.object(
+            reactions.transaction, 'on_commit', side_effect=lambda f: f()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def like_all(self):
+        for user in self.users:
+            reactions.like(user, self.post.pk)
+
+    def test_likes_are_counted_once_per_user(self):
+        self.like_all()
+        self.assertFalse(reactions.like(self.users[0], self.post.pk))
+        self.assertEqual(reactions.totals([self.post.pk]), {self.post.pk: 10})
+        self.assertTrue(reactions.unlike(self.users[0], self.post.pk))
+        self.assertFalse(reactions.unlike(self.users[0], self.post.pk))
+        self.assertEqual(reactions.totals([self.post.pk]), {self.post.pk: 9})
+        self.assertLessEqual(self.post.reaction_counters.count(), 4)
+
+    def test_totals_are_cached_until_change(self):
+        other = Post.objects.create(text='Другой', author=self.author)
+        self.like_all()
+        with self.assertNumQueries(1):
+            reactions.totals([self.post.pk, other.pk])
+        with self.assertNumQueries(0):
+            totals = reactions.totals([self.post.pk, other.pk])
+        self.assertEqual(totals, {self.post.pk: 10, other.pk: 0})
+        reactions.like(self.users[0], other.pk)
+        self.assertEqual(reactions.totals([other.pk]), {other.pk: 1})
+
+    def test_late_write_of_old_total_is_ignored(self):
+        """Сумма, посчитанная до отметки и записанная после её
+        инвалидации, не попадает в кеш новой версии."""
+        version = cache.get(reactions._version_key(self.post.pk), 0)
+        reactions.like(self.users[0], self.post.pk)
+        cache.set(reactions._cache_key(self.post.pk, version), 0)
+        self.assertEqual(reactions.totals([self.post.pk]), {self.post.pk: 1})
+
+    def test_like_schedules_snapshot_rebuild(self):
+        with mock.patch.object(reactions.snapshots, 'schedule') as schedule:
+            reactions.like(self.users[0], self.post.pk)
+            reactions.unlike(self.users[0], self.post.pk)
+        self.assertEqual(schedule.call_count, 2)
+        self.assertEqual(
+            list(schedule.call_args[0][0]), [self.post.group_id]
+        )
+
+    def test_compact_keeps_total_in_one_row(self):
+        self.like_all()
+        self.assertEqual(reactions.compact(), 1)
+        self.assertEqual(
+            list(self.post.reaction_counters.values_list('shard', 'count')),
+            [(0, 10)],
+        )
+        self.assertEqual(reactions.compact(), 0)
+
+    def test_recount_repairs_counters(self):
+        self.like_all()
+        ReactionCounter.objects.filter(post=self.post).update(count=100)
+        out = StringIO()
+        call_command('compact_reactions', recount=True, stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertEqual(reactions.totals([self.post.pk]), {self.post.pk: 10})
+
+    def test_deleting_user_removes_their_likes(self):
+        self.like_all()
+        User.objects.filter(pk=self.users[0].pk).update(is_active=False)
+        self.assertTrue(deletion.purge_step(self.users[0].pk))
+        self.assertEqual(reactions.totals([self.post.pk]), {self.post.pk: 9})
+
+    def test_like_view_toggles(self):
+        client = Client()
+        client.force_login(self.users[0])
+        url = reverse('posts:post_like', args=(self.post.pk,))
+        self.assertEqual(client.get(url).status_code, 405)
+        response = client.post(url)
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        detail = client.get(response.url)
+        self.assertEqual(detail.context['likes'], 1)
+        self.assertTrue(detail.context['liked'])
+        client.post(url)
+        self.assertFalse(Reaction.objects.exists())
+
+    def test_feed_reads_all_totals_at_once(self):
+        posts = [
+            Post.objects.create(text=f'Пост {n}', author=self.author)
+            for n in range(3)
+        ]
+        reactions.like(self.users[0], posts[0].pk)
+        with mock.patch.object(
+            reactions, 'totals', wraps=reactions.totals
+        ) as totals:
+            response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'Нравится: 1', count=1)
+        self.assertContains(response, 'Нравится: 0', count=3)
+        totals.assert_called_once()
+
+
+class BenchmarkTests(TransactionTestCase):
+    def test_benchmark_reports_each_shard_count(self):
+        out = StringIO()
+        call_command(
+            'benchmark_reactions', threads=2, likes=3, shards='1,2',
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        for line in lines[1:]:
+            shards, *_, errors, total = line.split()
+            self.assertEqual(int(total) + int(errors), 6)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(User.objects.exists())
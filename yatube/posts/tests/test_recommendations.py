@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import recommendations
+from ..models import Follow, FollowGraphChange, Recommendation
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('anna', 'boris', 'vera', 'gleb', 'dina', 'egor')
+        }
+        subscriptions = {
+            'anna': ('gleb',),
+            'boris': ('gleb', 'dina'),
+            'vera': ('gleb', 'dina', 'egor'),
+        }
+        for user, authors in subscriptions.items():
+            for author in authors:
+                Follow.objects.create(
+                    user=cls.users[user], author=cls.users[author]
+                )
+
+    def suggested(self, user):
+        if isinstance(user, str):
+            user = self.users[user]
+        return list(
+            Recommendation.objects.filter(user=user).values_list(
+                'author__username', flat=True
+            )
+        )
+
+    def test_rebuild_scores_co_follows(self):
+        """Рекомендуются авторы, которых читают похожие пользователи."""
+        recommendations.rebuild()
+        self.assertEqual(self.suggested('anna'), ['dina', 'egor'])
+        self.assertEqual(self.suggested('boris'), ['egor'])
+        self.assertEqual(self.suggested('vera'), [])
+        self.assertFalse(FollowGraphChange.objects.exists())
+
+    def test_refresh_touches_only_affected_users(self):
+        """Инкрементальный пересчёт не трогает чужие окрестности."""
+        recommendations.rebuild()
+        loner = User.objects.create_user(username='loner')
+        Follow.objects.create(user=loner, author=self.users['egor'])
+        users, _ = recommendations.refresh()
+        self.assertEqual(users, 2)
+        self.assertEqual(set(self.suggested(loner)), {'gleb', 'dina'})
+        self.assertFalse(FollowGraphChange.objects.exists())
+        self.assertEqual(recommendations.refresh(), (0, 0))
+
+    def test_follow_page_shows_suggestions(self):
+        """Страница подписок показывает рекомендации без уже читаемых."""
+        recommendations.rebuild()
+        client = Client()
+        client.force_login(self.users['anna'])
+        Follow.objects.create(
+            user=self.users['anna'], author=self.users['dina']
+        )
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [self.users['egor']],
+        )
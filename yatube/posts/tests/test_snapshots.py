@@ -0,0 +1,180 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from tasks.models import Task
+
+from .. import bulk, snapshots
+from ..models import Group, Post
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+
+def environ(path, query='', method='GET', cookie=''):
+    return {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'HTTP_COOKIE': cookie,
+        'wsgi.input': BytesIO(),
+    }
+
+
+@override_settings(
+    SNAPSHOTS_ENABLED=True,
+    SNAPSHOT_DIR=TEMP_DIR,
+    SNAPSHOT_PAGES=2,
+    TASKS_ALWAYS_EAGER=True,
+)
+class SnapshotTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+        # В TestCase транзакция не фиксируется, поэтому колбэки
+        # on_commit выполняются сразу.
+        patcher = mock.patch.object(
+            snapshots.transaction, 'on_commit', side_effect=lambda f: f()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, url_path, page=1):
+        with open(snapshots.file_path(url_path, page), encoding='utf-8') as f:
+            return f.read()
+
+    def test_new_post_rebuilds_index_and_group(self):
+        Post.objects.create(text='Свежий пост', author=self.user,
+                            group=self.group)
+        self.assertIn('Свежий пост', self.read('/'))
+        self.assertIn('Свежий пост', self.read('/group/group/'))
+        self.assertIn('Войти', self.read('/'))
+        leftovers = [
+            name for _, _, names in os.walk(TEMP_DIR)
+            for name in names if name.endswith('.part')
+        ]
+        self.assertEqual(leftovers, [])
+
+    def test_edit_and_delete_rebuild_snapshot(self):
+        post = Post.objects.create(text='Первый вариант', author=self.user)
+        self.client.force_login(self.user)
+        self.client.post(f'/posts/{post.pk}/edit/', {
+            'text': 'Второй вариант', 'version': post.version,
+        })
+        self.assertIn('Второй вариант', self.read('/'))
+        post.delete()
+        self.assertNotIn('Второй вариант', self.read('/'))
+
+    def test_pages_beyond_feed_are_removed(self):
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=self.user)
+            for number in range(11)
+        )
+        snapshots.build_index()
+        self.assertTrue(os.path.exists(snapshots.file_path('/', 2)))
+        bulk.run(
+            bulk.DELETE, Post.objects.values_list('pk', flat=True)[:5]
+        )
+        self.assertFalse(os.path.exists(snapshots.file_path('/', 2)))
+
+    def test_build_all_prunes_deleted_groups(self):
+        group = Group.objects.create(
+            title='Временная', slug='temporary', description='Описание'
+        )
+        snapshots.build_all()
+        self.assertTrue(os.path.exists(snapshots.file_path('/group/group/')))
+        os.makedirs(os.path.join(TEMP_DIR, 'group', 'gone'))
+        snapshots.build_all()
+        self.assertFalse(
+            os.path.isdir(os.path.join(TEMP_DIR, 'group', 'gone'))
+        )
+        group.delete()
+        self.assertFalse(
+            os.path.exists(snapshots.file_path('/group/temporary/'))
+        )
+        self.assertTrue(os.path.exists(snapshots.file_path('/group/group/')))
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_queued_rebuild_is_not_duplicated(self):
+        snapshots.schedule([self.group.pk])
+        snapshots.schedule([self.group.pk, None])
+        self.assertEqual(
+            Task.objects.filter(name=snapshots.rebuild.name).count(), 1
+        )
+
+    def test_lookup_accepts_only_feed_pages(self):
+        self.assertEqual(snapshots.lookup('/', ''), snapshots.file_path('/'))
+        self.assertEqual(
+            snapshots.lookup('/group/group/', 'page=2'),
+            snapshots.file_path('/group/group/', 2),
+        )
+        for path, query in (
+            ('/', 'page=3'),
+            ('/', 'page=0'),
+            ('/', 'page=1&q=x'),
+            ('/group/../../etc/', ''),
+            ('/profile/author/', ''),
+        ):
+            with self.subTest(path=path, query=query):
+                self.assertIsNone(snapshots.lookup(path, query))
+
+
+@override_settings(SNAPSHOTS_ENABLED=True, SNAPSHOT_DIR=TEMP_DIR)
+class SnapshotApplicationTests(TestCase):
+    def setUp(self):
+        snapshots.write_atomic(snapshots.file_path('/'), 'Снимок'.encode())
+        self.addCleanup(shutil.rmtree, TEMP_DIR, ignore_errors=True)
+        self.django = mock.Mock(return_value=[b'django'])
+        self.application = snapshots.SnapshotApplication(self.django)
+
+    def call(self, *args, **kwargs):
+        start_response = mock.Mock()
+        body = b''.join(
+            self.application(environ(*args, **kwargs), start_response)
+        )
+        return start_response.call_args[0] if start_response.called else (
+            None, None
+        ), body
+
+    def test_anonymous_get_served_from_disk(self):
+        (status, headers), body = self.call('/')
+        self.assertEqual(status, '200 OK')
+        self.assertIn(('X-Snapshot', 'hit'), headers)
+        self.assertEqual(body.decode(), 'Снимок')
+        self.django.assert_not_called()
+
+    def test_other_requests_reach_django(self):
+        for kwargs in (
+            {'cookie': f'{settings.SESSION_COOKIE_NAME}=abc'},
+            {'method': 'POST'},
+            {'query': 'page=2'},
+            {'query': 'utm=1'},
+        ):
+            with self.subTest(**kwargs):
+                self.django.reset_mock()
+                _, body = self.call('/', **kwargs)
+                self.assertEqual(body, b'django')
+                self.django.assert_called_once()
+
+    @override_settings(SNAPSHOTS_ENABLED=False)
+    def test_disabled(self):
+        _, body = self.call('/')
+        self.assertEqual(body, b'django')
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import threads
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class ThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        cls.other_post = Post.objects.create(text='Другой', author=cls.user)
+
+    def comment(self, text, parent=None, post=None):
+        return Comment.objects.create(
+            post=post or self.post, author=self.user, text=text,
+            parent=parent,
+        )
+
+    def texts(self, comments):
+        return [comment.text for comment in comments]
+
+    def test_segments_sort_like_ids(self):
+        self.assertEqual(threads.segment(35), '000000z')
+        self.assertLess(threads.segment(35), threads.segment(36))
+        self.assertLess(threads.segment(99), threads.segment(100))
+
+    def test_page_lists_replies_under_their_comment(self):
+        first = self.comment('первый')
+        second = self.comment('второй')
+        reply = self.comment('ответ на первый', parent=first)
+        self.comment('ответ на ответ', parent=reply)
+        self.comment('ответ на второй', parent=second)
+        self.comment('чужой', post=self.other_post)
+        with self.assertNumQueries(1):
+            comments, next_after = threads.thread_page(self.post)
+        self.assertEqual(self.texts(comments), [
+            'первый', 'ответ на первый', 'ответ на ответ',
+            'второй', 'ответ на второй',
+        ])
+        self.assertEqual([c.depth for c in comments], [0, 1, 2, 0, 1])
+        self.assertIsNone(next_after)
+
+    def test_thread_is_one_range(self):
+        first = self.comment('первый')
+        reply = self.comment('ответ', parent=first)
+        self.comment('второй')
+        comments, _ = threads.thread_page(self.post, root=reply)
+        self.assertEqual(self.texts(comments), ['ответ'])
+        comments, _ = threads.thread_page(self.post, root=first)
+        self.assertEqual(self.texts(comments), ['первый', 'ответ'])
+
+    def test_pages_continue_after_cursor(self):
+        parent = None
+        for number in range(5):
+            parent = self.comment(f'уровень {number}', parent=parent)
+        seen = []
+        after = None
+        while True:
+            comments, after = threads.thread_page(self.post, after, size=2)
+            seen += self.texts(comments)
+            if after is None:
+                break
+        self.assertEqual(seen, [f'уровень {number}' for number in range(5)])
+
+    @mock.patch.object(threads, 'MAX_DEPTH', 2)
+    def test_deep_reply_attaches_to_deepest_allowed_ancestor(self):
+        root = self.comment('корень')
+        child = self.comment('ребёнок', parent=root)
+        grandchild = self.comment('внук', parent=child)
+        deep = self.comment('правнук', parent=grandchild)
+        self.assertEqual(grandchild.depth, 2)
+        self.assertEqual(deep.parent, child)
+        self.assertEqual(deep.depth, 2)
+        self.assertTrue(deep.path.startswith(child.path))
+
+
+class ThreadViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        cls.other_post = Post.objects.create(text='Другой', author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.parent = Comment.objects.create(
+            post=self.post, author=self.user, text='Вопрос'
+        )
+
+    def test_reply_is_saved_under_parent(self):
+        self.client.post(
+            reverse('posts:add_comment', args=(self.post.id,)),
+            {'text': 'Ответ', 'parent': self.parent.id},
+        )
+        reply = Comment.objects.get(text='Ответ')
+        self.assertEqual(reply.parent, self.parent)
+        self.assertEqual(reply.depth, 1)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,)),
+            {'thread': self.parent.id},
+        )
+        self.assertEqual(
+            [c.text for c in response.context['comments']],
+            ['Вопрос', 'Ответ'],
+        )
+
+    def test_parent_from_other_post_is_ignored(self):
+        self.client.post(
+            reverse('posts:add_comment', args=(self.other_post.id,)),
+            {'text': 'Ответ', 'parent': self.parent.id},
+        )
+        reply = Comment.objects.get(text='Ответ')
+        self.assertEqual(reply.post, self.other_post)
+        self.assertIsNone(reply.parent)
+
+    def test_reply_link_fills_parent(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,)),
+            {'reply': self.parent.id},
+        )
+        self.assertContains(response, 'Ответить на комментарий')
+        self.assertContains(
+            response, f'name="parent" value="{self.parent.id}"'
+        )
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Post
+from ..paginators import NUMBER_OF_POSTS
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def test_comment_lifts_post_in_ranking(self):
+        """Комментарии поднимают пост выше более свежего."""
+        old = Post.objects.create(text='Старый пост', author=self.user)
+        new = Post.objects.create(text='Новый пост', author=self.user)
+        self.assertGreater(old.trending_score, 0)
+        for _ in range(3):
+            Comment.objects.create(post=old, author=self.user, text='Ого')
+        posts, _ = trending.trending_page()
+        self.assertEqual(posts, [old, new])
+
+    def test_decay_halves_scores_after_half_life(self):
+        """За период полураспада оценка уменьшается вдвое."""
+        post = Post.objects.create(text='Пост', author=self.user)
+        clock = trending.get_clock()
+        trending.decay(clock.decayed_at + timedelta(
+            seconds=trending.HALF_LIFE
+        ))
+        score = post.trending_score
+        post.refresh_from_db()
+        self.assertAlmostEqual(post.trending_score, score / 2)
+
+    def test_rebuild_matches_incremental_scores(self):
+        """Полный пересчёт даёт те же оценки, что и инкрементальный."""
+        post = Post.objects.create(text='Пост', author=self.user)
+        Comment.objects.create(post=post, author=self.user, text='Ого')
+        post.refresh_from_db()
+        score = post.trending_score
+        Post.objects.update(trending_score=0)
+        trending.rebuild()
+        post.refresh_from_db()
+        self.assertAlmostEqual(post.trending_score, score)
+
+    def test_stale_clock_is_moved_forward(self):
+        """Если затухание давно не запускалось, события всё равно
+        взвешиваются, а часы переводятся на момент события."""
+        post = Post.objects.create(text='Пост', author=self.user)
+        clock = trending.get_clock()
+        clock.decayed_at -= timedelta(days=300)
+        clock.save()
+        Comment.objects.create(post=post, author=self.user, text='Ого')
+        post.refresh_from_db()
+        self.assertGreater(post.trending_score, 0)
+        clock.refresh_from_db()
+        self.assertGreater(clock.decayed_at, timezone.now() - timedelta(
+            seconds=trending.MAX_ELAPSED
+        ))
+
+    def test_cursor_pagination(self):
+        """Курсор проходит рейтинг без повторов, в том числе после
+        затухания между запросами."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.user, trending_score=i % 4)
+            for i in range(13)
+        )
+        response = self.client.get(reverse('posts:trending'))
+        first = response.context['posts']
+        self.assertEqual(len(first), NUMBER_OF_POSTS)
+        trending.decay(timezone.now() + timedelta(hours=1))
+        response = self.client.get(
+            reverse('posts:trending'),
+            {'cursor': response.context['next_cursor']},
+        )
+        second = response.context['posts']
+        self.assertEqual(len(second), 3)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(
+            {post.pk for post in first + second},
+            set(Post.objects.values_list('pk', flat=True)),
+        )
+
+    def test_broken_cursor_shows_first_page(self):
+        response = self.client.get(
+            reverse('posts:trending'), {'cursor': 'мусор'}
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,72 @@
+import re
+
+from .models import Comment
+
+# Ширина сегмента пути: id в base36, дополненный нулями. Семи
+# символов хватает на 36**7 ≈ 78 млрд комментариев, а при равной
+# ширине строковый порядок путей совпадает с порядком ветки.
+SEGMENT_WIDTH = 7
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+# Больше любого символа сегмента: [path, path + END) — вся ветка.
+END = '~'
+MAX_DEPTH = 6
+PAGE_SIZE = 50
+_PATH = re.compile(r'^[0-9a-z]+$')
+
+
+def segment(pk):
+    digits = ''
+    while pk:
+        pk, rest = divmod(pk, len(DIGITS))
+        digits = DIGITS[rest] + digits
+    return digits.rjust(SEGMENT_WIDTH, '0')
+
+
+def place(comment):
+    """Глубина нового комментария; ответ сверх MAX_DEPTH поднимается.
+
+    Слишком глубокий ответ становится ответом на ближайшего предка,
+    для которого глубина ещё допустима, поэтому отступы в шаблоне
+    ограничены.
+    """
+    parent = comment.parent
+    while parent is not None and parent.depth >= MAX_DEPTH:
+        parent = parent.parent
+    comment.parent = parent
+    comment.depth = 0 if parent is None else parent.depth + 1
+
+
+def reply_parent(post, parent_id):
+    """Комментарий, на который отвечают, если он из того же поста.
+
+    Иначе ответ становится корнем новой ветки.
+    """
+    if not parent_id or not parent_id.isdigit():
+        return None
+    return post.comments.filter(pk=parent_id).first()
+
+
+def assign_path(comment):
+    """Путь известен только после INSERT: в него входит свой id."""
+    prefix = comment.parent.path if comment.parent_id else ''
+    comment.path = prefix + segment(comment.pk)
+    Comment.objects.filter(pk=comment.pk).update(path=comment.path)
+
+
+def thread_page(post, after=None, root=None, size=PAGE_SIZE):
+    """Страница комментариев поста в порядке ветки.
+
+    Один запрос по индексу (post, path): корни от старых к новым,
+    ответы сразу под своим комментарием. Если задан root — только его
+    ветка. Возвращает комментарии и курсор следующей страницы.
+    """
+    comments = post.comments.select_related('author').order_by('path')
+    if root is not None:
+        comments = comments.filter(
+            path__gte=root.path, path__lt=root.path + END
+        )
+    if after and _PATH.match(after):
+        comments = comments.filter(path__gt=after)
+    rows = list(comments[:size + 1])
+    next_after = rows[size - 1].path if len(rows) > size else None
+    return rows[:size], next_after
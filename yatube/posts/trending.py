@@ -0,0 +1,148 @@
+import base64
+import binascii
+import math
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Comment, Post, TrendingClock
+
+HALF_LIFE = 6 * 60 * 60
+POST_WEIGHT = 2.0
+COMMENT_WEIGHT = 1.0
+MIN_SCORE = 1e-3
+# Сколько можно прожить без decay_trending: за неделю вес события
+# вырастает в 2 ** 28 раз, дальше часы переводятся прямо при событии,
+# иначе веса переполнят float.
+MAX_ELAPSED = 7 * 24 * 60 * 60
+
+
+def decay_factor(seconds):
+    return 0.5 ** (seconds / HALF_LIFE)
+
+
+def get_clock():
+    clock = TrendingClock.objects.first()
+    if clock is None:
+        clock = TrendingClock.objects.create(decayed_at=timezone.now())
+    return clock
+
+
+def weight(base, at, decayed_at):
+    """Вес события, приведённый к моменту последнего затухания.
+
+    Свежие события весят больше: через HALF_LIFE после затухания
+    комментарий стоит вдвое дороже. Так оценки разных постов
+    сравнимы между собой без пересчёта всех строк на каждое событие.
+    """
+    elapsed = (at - decayed_at).total_seconds()
+    # Считаем в логарифмах: деление на decay_factor даёт ноль
+    # в знаменателе, когда множитель уходит в машинный ноль.
+    return math.exp(math.log(base) + elapsed / HALF_LIFE * math.log(2))
+
+
+def current_clock(at):
+    """Часы затухания, не отстающие от события больше MAX_ELAPSED."""
+    clock = get_clock()
+    if (at - clock.decayed_at).total_seconds() > MAX_ELAPSED:
+        decay(at)
+        clock = get_clock()
+    return clock
+
+
+def initial_score(at):
+    return weight(POST_WEIGHT, at, current_clock(at).decayed_at)
+
+
+def bump(post_id, base=COMMENT_WEIGHT, at=None):
+    """Атомарно добавляет посту вес нового события."""
+    at = at or timezone.now()
+    score = weight(base, at, current_clock(at).decayed_at)
+    Post.objects.filter(pk=post_id).update(
+        trending_score=F('trending_score') + score
+    )
+
+
+def decay(now=None):
+    """Приводит все оценки к текущему моменту одним UPDATE.
+
+    Запускается периодически, чтобы веса новых событий не росли
+    бесконечно. Совсем остывшие посты обнуляются и выпадают из индекса
+    «горячих» строк.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        clock = get_clock()
+        factor = decay_factor((now - clock.decayed_at).total_seconds())
+        updated = Post.objects.filter(trending_score__gt=0).update(
+            trending_score=F('trending_score') * factor
+        )
+        Post.objects.filter(
+            trending_score__gt=0, trending_score__lt=MIN_SCORE
+        ).update(trending_score=0)
+        clock.decayed_at = now
+        clock.save(update_fields=('decayed_at',))
+    return updated
+
+
+def rebuild(batch_size=1000):
+    """Пересчитывает оценки с нуля, читая посты и комментарии потоком."""
+    with transaction.atomic():
+        decayed_at = current_clock(timezone.now()).decayed_at
+        scores = {}
+        posts = Post.objects.values_list('id', 'pub_date')
+        for post_id, pub_date in posts.iterator(chunk_size=batch_size):
+            scores[post_id] = weight(POST_WEIGHT, pub_date, decayed_at)
+        comments = Comment.objects.values_list('post_id', 'created')
+        for post_id, created in comments.iterator(chunk_size=batch_size):
+            scores[post_id] += weight(COMMENT_WEIGHT, created, decayed_at)
+        Post.objects.bulk_update(
+            [
+                Post(pk=post_id, trending_score=score)
+                for post_id, score in scores.items()
+            ],
+            ['trending_score'],
+            batch_size=batch_size,
+        )
+    return len(scores)
+
+
+def encode_cursor(post, decayed_at):
+    raw = f'{post.trending_score!r}:{post.pk}:{decayed_at.timestamp()!r}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, decayed_at):
+    """Разбирает курсор; оценку из старой эпохи приводит к текущей."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        score, post_id, epoch = raw.split(':')
+        score, post_id, epoch = float(score), int(post_id), float(epoch)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    shift = decayed_at.timestamp() - epoch
+    if shift:
+        score *= decay_factor(shift)
+    return score, post_id
+
+
+def trending_page(cursor=None, size=10):
+    """Страница рейтинга по ключу (score, id) и курсор следующей."""
+    decayed_at = get_clock().decayed_at
+    posts = Post.objects.select_related('author', 'group').order_by(
+        '-trending_score', '-id'
+    )
+    position = decode_cursor(cursor, decayed_at) if cursor else None
+    if position is not None:
+        score, post_id = position
+        posts = posts.filter(
+            Q(trending_score__lt=score)
+            | Q(trending_score=score, id__lt=post_id)
+        )
+    page = list(posts[:size + 1])
+    next_cursor = None
+    if len(page) > size:
+        page = page[:size]
+        next_cursor = encode_cursor(page[-1], decayed_at)
+    return page, next_cursor
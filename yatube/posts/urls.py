@@ -5,6 +5,9 @@ from . import views
 app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
@@ -13,7 +16,11 @@ urlpatterns = [
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
+    path('posts/<int:post_id>/like/', views.post_like, name='post_like'),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'notifications/', views.notifications, name='notifications'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
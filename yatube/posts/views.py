@@ -1,14 +1,31 @@
+from http import HTTPStatus
+
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
+
+from core import fragments
 
+from .autocomplete import search
+from .edits import EditConflict, save_changes
+from .follows import is_following
 from .forms import CommentForm, PostForm
+from .groups import directory_page
 from .models import Follow, Group, Post, User
-from .paginators import post_paginator
+from .notifications import inbox_page, mark_read
+from .paginators import NUMBER_OF_POSTS, post_paginator
+from .reactions import has_liked, like, totals, unlike
+from .tasks import warm_thumbnails
+from .threads import reply_parent, thread_page
+from .trending import trending_page
 
 CACHING_TIME = 20
+SUGGESTIONS_COUNT = 5
 
 
+@fragments.defer
 @cache_page(CACHING_TIME, key_prefix='index_page')
 def index(request):
     posts = Post.objects.select_related('author', 'group')
@@ -18,11 +35,41 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+def trending(request):
+    posts, next_cursor = trending_page(
+        request.GET.get('cursor'), NUMBER_OF_POSTS
+    )
+    context = {
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'trending': True,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def autocomplete(request):
+    query = request.GET.get('q', '').strip()
+    return JsonResponse({'results': search(query) if query else []})
+
+
+def group_index(request):
+    after = request.GET.get('after')
+    groups, next_after = directory_page(
+        int(after) if after and after.isdigit() else None
+    )
+    context = {
+        'groups': groups,
+        'next_after': next_after,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author')
+    page_obj = post_paginator(posts, request)
     context = {
-        'page_obj': post_paginator(posts, request),
+        'page_obj': page_obj,
         'group': group,
     }
     return render(request, 'posts/group_list.html', context)
@@ -35,18 +82,32 @@ def profile(request, username):
         'author': author,
         'page_obj': post_paginator(posts, request),
         'posts': posts,
+        'following': is_following(request.user, [author])[author.pk],
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
     post = get_object_or_404(Post.objects.select_related(), id=post_id)
-    comments = post.comments.select_related('post')
+    thread_id = request.GET.get('thread', '')
+    thread = (
+        get_object_or_404(post.comments, pk=thread_id)
+        if thread_id.isdigit() else None
+    )
+    comments, next_after = thread_page(
+        post, request.GET.get('after'), thread
+    )
+    reply_id = request.GET.get('reply', '')
     comment_form = CommentForm(request.POST or None)
     context = {
         'post': post,
         'post_id': post_id,
         'comments': comments,
+        'next_after': next_after,
+        'thread': thread,
+        'reply_id': reply_id if reply_id.isdigit() else None,
+        'liked': has_liked(request.user, post.pk),
+        'likes': totals([post.pk])[post.pk],
         'form': comment_form,
     }
     return render(request, 'posts/post_detail.html', context)
@@ -73,6 +134,8 @@ def post_create(request):
     post.group = form.cleaned_data['group']
     post.author = request.user
     post.save()
+    if post.image:
+        warm_thumbnails.delay(post.id)
     return redirect('posts:profile', request.user)
 
 
@@ -86,10 +149,26 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post
     )
+    context = {'form': form, 'is_edit': True, 'post_id': post_id, }
     if not form.is_valid():
-        context = {'form': form, 'is_edit': True, 'post_id': post_id, }
         return render(request, 'posts/create_post.html', context)
-    form.save()
+    version = request.POST.get('version', '')
+    try:
+        changed = save_changes(
+            form, int(version) if version.isdigit() else None
+        )
+    except EditConflict:
+        form.add_error(
+            None,
+            'Запись изменили, пока вы её редактировали. '
+            'Обновите страницу и внесите правки ещё раз.'
+        )
+        return render(
+            request, 'posts/create_post.html', context,
+            status=HTTPStatus.CONFLICT,
+        )
+    if 'image' in changed and post.image:
+        warm_thumbnails.delay(post.id)
     return redirect('posts:post_detail', post_id)
 
 
@@ -101,16 +180,46 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        comment.parent = reply_parent(post, request.POST.get('parent'))
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@login_required
+def notifications(request):
+    before = request.GET.get('before', '')
+    page, next_before = inbox_page(
+        request.user, int(before) if before.isdigit() else None
+    )
+    context = {
+        'notifications': page,
+        'next_before': next_before,
+    }
+    response = render(request, 'posts/notifications.html', context)
+    # Показанные уведомления прочитаны; отметка новыми видна в этом
+    # ответе, а не в следующем.
+    mark_read(request.user, page)
+    return response
+
+
+@require_POST
+@login_required
+def post_like(request, post_id):
+    post = get_object_or_404(Post, id=post_id)
+    if not like(request.user, post.pk):
+        unlike(request.user, post.pk)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
 @login_required
 def follow_index(request):
     follower_authors = request.user.follower.select_related('author')
     posts = Post.objects.filter(author__following__in=follower_authors)
     page_obj = post_paginator(posts, request)
-    context = {'page_obj': page_obj, }
+    suggestions = request.user.recommendations.select_related(
+        'author'
+    ).exclude(author__following__user=request.user)[:SUGGESTIONS_COUNT]
+    context = {'page_obj': page_obj, 'suggestions': suggestions, }
     return render(request, 'posts/follow.html', context)
 
 
@@ -125,5 +234,5 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(author=author.id).delete()
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect("posts:follow_index")
@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'priority', 'attempts', 'run_at', 'finished'
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_until', 'locked_by', 'last_error', 'finished')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,54 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Task
+
+registry = {}
+
+
+class TaskFunction:
+    """Обёртка над функцией, которую можно поставить в очередь."""
+
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.__name__ = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args=(), kwargs=None, priority=None, countdown=0):
+        kwargs = kwargs or {}
+        if getattr(settings, 'TASKS_ALWAYS_EAGER', False):
+            self.func(*args, **kwargs)
+            return None
+        return Task.objects.create(
+            name=self.name,
+            payload=json.dumps({'args': list(args), 'kwargs': kwargs}),
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=countdown),
+        )
+
+
+def task(name=None, priority=0, max_attempts=5):
+    """Регистрирует функцию как фоновую задачу.
+
+    Аргументы задачи сериализуются в JSON, поэтому передавать
+    нужно идентификаторы объектов, а не сами объекты.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        wrapper = TaskFunction(func, task_name, priority, max_attempts)
+        registry[task_name] = wrapper
+        return wrapper
+    return decorator
@@ -0,0 +1,70 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.worker import default_worker_id, discover_tasks, run_pending
+
+POLL_INTERVAL = 1.0
+
+
+def worker_loop(poll_interval, burst):
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *args: stopping.append(True))
+    worker_id = default_worker_id()
+    while not stopping:
+        done = run_pending(worker_id, limit=1)
+        if done:
+            continue
+        if burst:
+            break
+        time.sleep(poll_interval)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчики фоновых задач из очереди в базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Количество процессов-обработчиков.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=POLL_INTERVAL,
+            help='Пауза в секундах, если очередь пуста.',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда очередь опустеет.',
+        )
+
+    def handle(self, *args, **options):
+        discover_tasks()
+        processes = max(options['processes'], 1)
+        if processes == 1:
+            worker_loop(options['poll_interval'], options['burst'])
+            return
+        # Дочерние процессы не должны делить соединение с базой.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=worker_loop,
+                args=(options['poll_interval'], options['burst']),
+            )
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Запущено обработчиков: {processes}')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,84 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=200
+    )
+    payload = models.TextField(
+        verbose_name='Аргументы',
+        default='{}'
+    )
+    priority = models.SmallIntegerField(
+        verbose_name='Приоритет',
+        default=0,
+        help_text='Задачи с большим приоритетом выполняются раньше'
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток',
+        default=5
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Запустить не раньше',
+        default=timezone.now
+    )
+    locked_until = models.DateTimeField(
+        verbose_name='Занята до',
+        blank=True,
+        null=True
+    )
+    locked_by = models.CharField(
+        verbose_name='Обработчик',
+        max_length=64,
+        blank=True
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    finished = models.DateTimeField(
+        verbose_name='Дата завершения',
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        ordering = ['-priority', 'run_at', 'id']
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='task_pick_idx',
+            ),
+        ]
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..decorators import task
+from ..models import Task
+from ..worker import run_pending
+
+User = get_user_model()
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+class WorkerTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_puts_task_into_queue(self):
+        """delay() сохраняет задачу в базу, а не выполняет её."""
+        queued = record.delay(1)
+        self.assertEqual(queued.status, Task.QUEUED)
+        self.assertEqual(calls, [])
+        self.assertEqual(run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.DONE)
+        self.assertEqual(calls, [1])
+
+    def test_priority_order(self):
+        """Задачи с большим приоритетом выполняются первыми."""
+        record.apply_async(('low',), priority=0)
+        record.apply_async(('high',), priority=5)
+        run_pending()
+        self.assertEqual(calls, ['high', 'low'])
+
+    def test_failed_task_is_retried_with_backoff(self):
+        """Упавшая задача откладывается, а после всех попыток — ошибка."""
+        queued = explode.delay()
+        run_pending()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.QUEUED)
+        self.assertEqual(queued.attempts, 1)
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn('boom', queued.last_error)
+        Task.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        run_pending()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+
+    def test_expired_visibility_timeout_releases_task(self):
+        """Задачу упавшего обработчика забирает другой обработчик."""
+        queued = record.delay(2)
+        Task.objects.filter(pk=queued.pk).update(
+            status=Task.RUNNING,
+            attempts=1,
+            locked_by='dead-worker',
+            locked_until=timezone.now() + timedelta(minutes=1),
+        )
+        self.assertEqual(run_pending(), 0)
+        Task.objects.filter(pk=queued.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [2])
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode(self):
+        """В синхронном режиме задача выполняется сразу."""
+        self.assertIsNone(record.delay(3))
+        self.assertEqual(calls, [3])
+        self.assertFalse(Task.objects.exists())
+
+    def test_password_reset_email_is_queued(self):
+        """Письмо для сброса пароля уходит из фоновой задачи."""
+        User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass'
+        )
+        self.client.post(
+            reverse('users:password_reset'), {'email': 'reader@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Task.objects.count(), 1)
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import random
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .decorators import registry
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+VISIBILITY_TIMEOUT = 300
+RETRY_BACKOFF = 10
+MAX_RETRY_DELAY = 60 * 60
+CLAIM_BATCH = 10
+
+
+def discover_tasks():
+    """Импортирует модули tasks.py всех приложений проекта."""
+    autodiscover_modules('tasks')
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повтором с небольшим разбросом."""
+    base = getattr(settings, 'TASKS_RETRY_BACKOFF', RETRY_BACKOFF)
+    delay = min(base * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+    return delay + random.uniform(0, base)
+
+
+def _available(now):
+    """Задачи, которые можно взять в работу.
+
+    Зависшие задачи, чей таймаут видимости истёк, снова становятся
+    доступными: обработчик, взявший их, скорее всего упал.
+    """
+    return (
+        Q(status=Task.QUEUED, run_at__lte=now)
+        | Q(status=Task.RUNNING, locked_until__lt=now)
+    ) & Q(attempts__lt=F('max_attempts'))
+
+
+def fail_exhausted():
+    """Помечает ошибочными зависшие задачи без оставшихся попыток."""
+    return Task.objects.filter(
+        status=Task.RUNNING,
+        locked_until__lt=timezone.now(),
+        attempts__gte=F('max_attempts'),
+    ).update(
+        status=Task.FAILED,
+        finished=timezone.now(),
+        last_error='Истёк таймаут видимости',
+    )
+
+
+def claim(worker_id):
+    """Забирает одну задачу, не удерживая блокировку базы.
+
+    Задача захватывается условным UPDATE: если её успел забрать другой
+    обработчик, UPDATE не затронет ни одной строки и мы перейдём
+    к следующему кандидату.
+    """
+    timeout = getattr(settings, 'TASKS_VISIBILITY_TIMEOUT', VISIBILITY_TIMEOUT)
+    now = timezone.now()
+    candidates = Task.objects.filter(_available(now)).values_list(
+        'id', flat=True
+    )[:CLAIM_BATCH]
+    for task_id in list(candidates):
+        updated = Task.objects.filter(_available(now), pk=task_id).update(
+            status=Task.RUNNING,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=timeout),
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            return Task.objects.get(pk=task_id)
+    return None
+
+
+def execute(task, worker_id):
+    owned = Task.objects.filter(pk=task.pk, locked_by=worker_id)
+    func = registry.get(task.name)
+    try:
+        if func is None:
+            raise LookupError(f'Задача {task.name} не зарегистрирована')
+        payload = json.loads(task.payload)
+        func(*payload.get('args', ()), **payload.get('kwargs', {}))
+    except Exception as error:
+        logger.exception('Задача %s завершилась с ошибкой', task)
+        if task.attempts >= task.max_attempts:
+            owned.update(
+                status=Task.FAILED,
+                finished=timezone.now(),
+                last_error=repr(error),
+            )
+        else:
+            owned.update(
+                status=Task.QUEUED,
+                locked_until=None,
+                run_at=timezone.now() + timedelta(
+                    seconds=retry_delay(task.attempts)
+                ),
+                last_error=repr(error),
+            )
+        return False
+    owned.update(status=Task.DONE, finished=timezone.now(), locked_until=None)
+    return True
+
+
+def run_pending(worker_id=None, limit=None):
+    """Выполняет доступные задачи и возвращает их количество."""
+    worker_id = worker_id or default_worker_id()
+    fail_exhausted()
+    done = 0
+    while limit is None or done < limit:
+        task = claim(worker_id)
+        if task is None:
+            break
+        execute(task, worker_id)
+        done += 1
+    return done
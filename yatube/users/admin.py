@@ -1,3 +1,58 @@
-# from django.contrib import admin
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.http import HttpResponseRedirect
+from django.urls import reverse
 
-# Register your models here.
+from .deletion import request_deletion
+
+User = get_user_model()
+
+
+class YatubeUserAdmin(UserAdmin):
+    actions = ('delete_in_background',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Стандартное удаление каскадом удаляет всё в одной транзакции.
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        # Страница подтверждения не собирает все связанные объекты:
+        # удалять их будет фоновая задача.
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        request_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            request_deletion(user)
+
+    def response_delete(self, request, obj_display, obj_id):
+        self.message_user(
+            request,
+            f'Аккаунт {obj_display} отключён. Данные будут удалены в фоне.',
+        )
+        opts = self.model._meta
+        return HttpResponseRedirect(reverse(
+            f'admin:{opts.app_label}_{opts.model_name}_changelist',
+            current_app=self.admin_site.name,
+        ))
+
+    def delete_in_background(self, request, queryset):
+        users = list(queryset.exclude(pk=request.user.pk))
+        for user in users:
+            request_deletion(user)
+        self.message_user(
+            request,
+            f'Аккаунты отключены: {len(users)}. '
+            'Данные будут удалены в фоне.',
+        )
+    delete_in_background.short_description = 'Отключить и удалить в фоне'
+    delete_in_background.allowed_permissions = ('delete',)
+
+
+admin.site.unregister(User)
+admin.site.register(User, YatubeUserAdmin)
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+USER_KEY = 'auth:user:{}'
+# Страховка на случай изменения пользователя в обход сигналов
+# или в другом процессе с отдельным LocMemCache.
+CACHE_TIME = 5 * 60
+
+
+def enabled():
+    return getattr(settings, 'USER_CACHE_ENABLED', True)
+
+
+def invalidate(user_id):
+    cache.delete(USER_KEY.format(user_id))
+
+
+def load_user(backend_path, user_id):
+    """Пользователь из кеша или, при промахе, из бэкенда."""
+    if not enabled():
+        return auth.load_backend(backend_path).get_user(user_id)
+    key = USER_KEY.format(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = auth.load_backend(backend_path).get_user(user_id)
+        if user is not None:
+            cache.set(key, user, CACHE_TIME)
+    return user
+
+
+def get_user(request):
+    """То же, что django.contrib.auth.get_user, но без запроса к User.
+
+    Хеш сессии сверяется с закешированным пользователем: после смены
+    пароля кеш сбрасывается сигналом, и старые сессии перестают
+    действовать так же, как без кеша.
+    """
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    user = load_user(backend_path, user_id)
+    if user is None:
+        return AnonymousUser()
+    if hasattr(user, 'get_session_auth_hash'):
+        session_hash = request.session.get(auth.HASH_SESSION_KEY)
+        if not session_hash or not constant_time_compare(
+            session_hash, user.get_session_auth_hash()
+        ):
+            request.session.flush()
+            return AnonymousUser()
+    user.backend = backend_path
+    return user
+
+
+def get_cached_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, берущий пользователя из кеша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core import checks
+
+CACHED_SESSIONS = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Кеш сессий, пользователей и счётчиков уведомлений должен быть
+    общим для процессов."""
+    if getattr(settings, 'SHARED_CACHE', True):
+        return []
+    errors = []
+    if settings.SESSION_ENGINE in CACHED_SESSIONS:
+        errors.append(checks.Warning(
+            'Сессии хранятся в кеше, который у каждого процесса свой.',
+            hint=(
+                'Настройте общий кеш (YATUBE_CACHE_BACKEND) или '
+                'используйте django.contrib.sessions.backends.db.'
+            ),
+            id='users.W001',
+        ))
+    if getattr(settings, 'USER_CACHE_ENABLED', False):
+        errors.append(checks.Warning(
+            'Пользователи кешируются в кеше, который у каждого процесса '
+            'свой.',
+            hint='Настройте общий кеш или отключите USER_CACHE_ENABLED.',
+            id='users.W002',
+        ))
+    if getattr(settings, 'UNREAD_CACHE_ENABLED', False):
+        errors.append(checks.Warning(
+            'Счётчик уведомлений кешируется в кеше, который у каждого '
+            'процесса свой, а сбрасывает его воркер задач.',
+            hint='Настройте общий кеш или отключите UNREAD_CACHE_ENABLED.',
+            id='users.W003',
+        ))
+    return errors
@@ -0,0 +1,124 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from posts import groups, notifications, reactions
+from posts.models import (
+    Comment, Follow, Notification, Post, Reaction, Recommendation
+)
+from tasks.decorators import task
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+BATCH_SIZE = 500
+BATCHES_PER_RUN = 20
+
+
+def request_deletion(user):
+    """Сразу отключает аккаунт и ставит удаление данных в очередь.
+
+    Пароль сбрасывается, поэтому все сессии пользователя
+    перестают действовать.
+    """
+    user.is_active = False
+    user.set_unusable_password()
+    user.save(update_fields=('is_active', 'password'))
+    return purge_user.delay(user.pk)
+
+
+def _delete_batch(queryset):
+    ids = list(queryset.values_list('pk', flat=True)[:BATCH_SIZE])
+    if ids:
+        with transaction.atomic():
+            queryset.model.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def _delete_reactions_batch(user_id):
+    return reactions.forget(list(
+        Reaction.objects.filter(user_id=user_id).values_list(
+            'pk', flat=True
+        )[:BATCH_SIZE]
+    ))
+
+
+def _delete_comments_batch(user_id):
+    """Удаляет комментарии пользователя, на которые нет ответов.
+
+    Комментарий с ответами остаётся пустым надгробием без автора
+    и текста: по его пути строятся ветки, а удаление каскадом унесло
+    бы ответы других людей и сделало бы пачку неограниченной.
+    """
+    ids = list(
+        Comment.objects.filter(author_id=user_id).values_list(
+            'pk', flat=True
+        )[:BATCH_SIZE]
+    )
+    if ids:
+        with transaction.atomic():
+            # Ответы пользователя самому себе освобождают родителя:
+            # повторов не больше глубины ветки.
+            while Comment.objects.filter(
+                pk__in=ids, replies__isnull=True
+            ).delete()[0]:
+                pass
+            Comment.objects.filter(pk__in=ids).update(author=None, text='')
+    return len(ids)
+
+
+def _delete_posts_batch(user_id):
+    ids = list(
+        Post.objects.filter(author_id=user_id).values_list('pk', flat=True)[
+            :BATCH_SIZE
+        ]
+    )
+    if not ids:
+        return 0
+    # Ссылки на картинки снимает сигнал post_delete.
+    with transaction.atomic(), groups.deferred_stats():
+        Comment.objects.filter(post_id__in=ids).delete()
+        notifications.posts_removed(ids)
+        Post.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def purge_step(user_id):
+    """Удаляет не больше BATCHES_PER_RUN пачек данных пользователя.
+
+    Возвращает True, когда пользователь удалён полностью. Каждый
+    шаг определяет, что осталось, по текущему состоянию базы, поэтому
+    повторный или прерванный запуск безопасно продолжает работу.
+    """
+    stages = (
+        lambda: _delete_comments_batch(user_id),
+        lambda: _delete_batch(Follow.objects.filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        )),
+        lambda: _delete_batch(Recommendation.objects.filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        )),
+        lambda: _delete_reactions_batch(user_id),
+        lambda: _delete_batch(Notification.objects.filter(user_id=user_id)),
+        lambda: _delete_posts_batch(user_id),
+    )
+    budget = BATCHES_PER_RUN
+    for stage in stages:
+        while budget:
+            deleted = stage()
+            if deleted < BATCH_SIZE:
+                break
+            budget -= 1
+        if not budget:
+            return False
+    User.objects.filter(pk=user_id, is_active=False).delete()
+    return True
+
+
+@task(priority=-10, max_attempts=10)
+def purge_user(user_id):
+    if not purge_step(user_id):
+        logger.info('Удаление пользователя %s продолжится', user_id)
+        purge_user.delay(user_id)
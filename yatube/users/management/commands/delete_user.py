@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from users.deletion import purge_step, request_deletion
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Отключает пользователя и удаляет его данные пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--now', action='store_true',
+            help='Удалить сразу в этом процессе, а не в фоновой задаче.',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError('Пользователь не найден')
+        request_deletion(user)
+        if not options['now']:
+            self.stdout.write(
+                'Аккаунт отключён, удаление поставлено в очередь'
+            )
+            return
+        while not purge_step(user.pk):
+            self.stdout.write('.', ending='')
+        self.stdout.write('Пользователь удалён')
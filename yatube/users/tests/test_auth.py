@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..checks import check_shared_cache
+
+User = get_user_model()
+CACHED_DB = 'django.contrib.sessions.backends.cached_db'
+
+
+@override_settings(
+    USER_CACHE_ENABLED=True, UNREAD_CACHE_ENABLED=True,
+    SESSION_ENGINE=CACHED_DB,
+)
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', password='old-password-1'
+        )
+        self.client = Client()
+        self.client.login(username='reader', password='old-password-1')
+        self.url = reverse('about:author')
+
+    def test_logged_in_page_needs_no_session_or_user_query(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Пользователь: reader')
+
+    @override_settings(USER_CACHE_ENABLED=False)
+    def test_cache_can_be_disabled(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_profile_update_is_visible_at_once(self):
+        self.client.get(self.url)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertContains(
+            self.client.get(self.url), 'Пользователь: renamed'
+        )
+
+    def test_password_change_logs_out_other_sessions(self):
+        other = Client()
+        other.login(username='reader', password='old-password-1')
+        other.get(self.url)
+        response = self.client.post(reverse('users:password_change'), {
+            'old_password': 'old-password-1',
+            'new_password1': 'new-password-2',
+            'new_password2': 'new-password-2',
+        })
+        self.assertRedirects(response, reverse('users:password_change_done'))
+        self.assertContains(self.client.get(self.url), 'Выйти')
+        self.assertContains(other.get(self.url), 'Войти')
+
+    def test_deactivated_user_is_logged_out(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertContains(self.client.get(self.url), 'Войти')
+
+
+class SharedCacheCheckTests(TestCase):
+    @override_settings(SHARED_CACHE=False, SESSION_ENGINE=CACHED_DB)
+    def test_cached_sessions_need_shared_cache(self):
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)], ['users.W001']
+        )
+
+    @override_settings(SHARED_CACHE=False, UNREAD_CACHE_ENABLED=True)
+    def test_cached_unread_count_needs_shared_cache(self):
+        self.assertIn(
+            'users.W003', [error.id for error in check_shared_cache(None)]
+        )
+
+    @override_settings(SHARED_CACHE=True, SESSION_ENGINE=CACHED_DB)
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
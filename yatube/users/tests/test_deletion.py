@@ -0,0 +1,133 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib import admin
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from tasks.models import Task
+from tasks.worker import run_pending
+
+from .. import deletion
+
+User = get_user_model()
+
+
+@mock.patch.object(deletion, 'BATCH_SIZE', 2)
+@mock.patch.object(deletion, 'BATCHES_PER_RUN', 2)
+class UserDeletionTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='prolific', password='pass'
+        )
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=self.author, group=self.group
+            )
+            for i in range(5)
+        ]
+        self.reader_post = Post.objects.create(
+            text='Чужой пост', author=self.reader, group=self.group
+        )
+        for post in self.posts:
+            Comment.objects.create(post=post, author=self.reader, text='Ого')
+            Comment.objects.create(
+                post=self.reader_post, author=self.author, text='Ого'
+            )
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+
+    def test_account_is_disabled_immediately(self):
+        """Аккаунт отключается сразу, данные удаляются потом."""
+        client = Client()
+        client.force_login(self.author)
+        deletion.request_deletion(self.author)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertFalse(self.author.has_usable_password())
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        self.assertEqual(Task.objects.count(), 1)
+        response = client.get('/create/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_background_purge_is_chunked_and_resumable(self):
+        """Удаление идёт несколькими задачами и доводится до конца."""
+        deletion.request_deletion(self.author)
+        self.assertEqual(run_pending(limit=1), 1)
+        self.assertTrue(User.objects.filter(pk=self.author.pk).exists())
+        run_pending()
+        self.assertGreater(Task.objects.filter(status=Task.DONE).count(), 1)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+        self.assertFalse(self.reader_post.comments.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+
+    def test_purge_keeps_replies_of_other_users(self):
+        """Комментарий с ответами становится надгробием, ответы
+        остаются на своих местах в ветке."""
+        parent = self.reader_post.comments.filter(author=self.author).first()
+        reply = Comment.objects.create(
+            post=self.reader_post, author=self.reader, text='Ответ',
+            parent=parent,
+        )
+        deletion.request_deletion(self.author)
+        run_pending()
+        self.assertEqual(
+            list(self.reader_post.comments.order_by('path')),
+            [parent, reply],
+        )
+        parent.refresh_from_db()
+        self.assertIsNone(parent.author_id)
+        self.assertEqual(parent.text, '')
+        self.assertTrue(Comment.objects.get(pk=reply.pk).path.startswith(
+            parent.path
+        ))
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.reader_post.pk,))
+        )
+        self.assertContains(response, 'Комментарий удалён')
+        self.assertContains(response, 'Ответ')
+
+    def test_purge_is_idempotent(self):
+        deletion.request_deletion(self.author)
+        while not deletion.purge_step(self.author.pk):
+            pass
+        self.assertTrue(deletion.purge_step(self.author.pk))
+
+
+class UserAdminDeletionTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.author = User.objects.create_user(username='prolific')
+        Post.objects.create(text='Пост', author=self.author)
+        self.client.force_login(self.admin)
+
+    def test_stock_bulk_delete_is_hidden(self):
+        request = RequestFactory().get('/')
+        request.user = self.admin
+        actions = admin.site._registry[User].get_actions(request)
+        self.assertNotIn('delete_selected', actions)
+        self.assertIn('delete_in_background', actions)
+
+    def test_delete_button_queues_purge(self):
+        """Кнопка «Удалить» на странице пользователя не удаляет каскадом."""
+        response = self.client.post(
+            reverse('admin:auth_user_delete', args=(self.author.pk,)),
+            {'post': 'yes'},
+        )
+        self.assertRedirects(response, reverse('admin:auth_user_changelist'))
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertTrue(Post.objects.filter(author=self.author).exists())
+        self.assertEqual(
+            Task.objects.filter(name=deletion.purge_user.name).count(), 1
+        )
@@ -26,7 +26,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = os.getenv('YATUBE_SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('YATUBE_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -46,21 +46,32 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'tasks.apps.TasksConfig',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.auth.CachedAuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.FragmentMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.RateLimitMiddleware',
 ]
 
+# Отладочная панель импортирует немало модулей при django.setup();
+# в рабочем режиме она не нужна.
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -158,6 +169,83 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.getenv(
+            'YATUBE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('YATUBE_CACHE_LOCATION', ''),
     }
 }
+
+# LocMemCache у каждого процесса свой: выход из системы или смена
+# пароля в одном процессе не сбросили бы сессию и пользователя
+# в кеше других. Поэтому сессии и пользователи читаются из кеша,
+# только когда настроен общий кеш.
+SHARED_CACHE = not CACHES['default']['BACKEND'].endswith('.LocMemCache')
+
+SESSION_ENGINE = os.getenv(
+    'YATUBE_SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SHARED_CACHE
+    else 'django.contrib.sessions.backends.db',
+)
+
+USER_CACHE_ENABLED = SHARED_CACHE
+
+# Счётчик непрочитанных уведомлений сбрасывает воркер задач, то есть
+# другой процесс: без общего кеша счётчик считается по базе.
+UNREAD_CACHE_ENABLED = SHARED_CACHE
+
+# Сколько строк-частей у счётчика отметок одного поста.
+REACTION_SHARDS = 8
+
+TASKS_ALWAYS_EAGER = False
+
+TASKS_VISIBILITY_TIMEOUT = 300
+
+TASKS_RETRY_BACKOFF = 10
+
+RATELIMIT_ENABLED = True
+
+# Без общего кеша (SHARED_CACHE) у каждого процесса свои корзины
+# и лимит фактически умножается на число процессов; об этом
+# предупреждает проверка core.W001.
+RATELIMIT_CACHE = 'default'
+
+RATELIMITS = {
+    'posts:post_create': '20/m',
+    'posts:add_comment': '30/m',
+    'posts:post_like': '60/m',
+    'posts:profile_follow': '60/m',
+    'users:signup': '20/h',
+}
+
+# Адреса, где ограничиваются и GET-запросы: они тоже меняют данные.
+RATELIMIT_ALL_METHODS = ('posts:profile_follow',)
+
+SERVER_TIMING_ENABLED = True
+
+METRICS_ENABLED = True
+
+# Каталог для файлов метрик процессов; по умолчанию во временном.
+METRICS_DIR = os.getenv('YATUBE_METRICS_DIR')
+
+# Каталог сохранённых профилей запросов и сколько из них хранить.
+PROFILE_DIR = os.getenv('YATUBE_PROFILE_DIR')
+
+PROFILE_KEEP = 50
+
+SLOW_QUERY_LOG_ENABLED = True
+
+# Порог в миллисекундах и файл журнала медленных запросов.
+SLOW_QUERY_MS = 100
+
+SLOW_QUERY_LOG = os.getenv('YATUBE_SLOW_QUERY_LOG')
+
+# Готовые HTML-снимки первых страниц лент для анонимных посетителей.
+SNAPSHOTS_ENABLED = os.getenv('YATUBE_SNAPSHOTS', 'False') == 'True'
+
+SNAPSHOT_DIR = os.getenv(
+    'YATUBE_SNAPSHOT_DIR', os.path.join(BASE_DIR, 'snapshots')
+)
+
+SNAPSHOT_PAGES = 3
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Импорт после настройки Django: модулю нужны модели.
+from posts.snapshots import SnapshotApplication  # noqa: E402
+
+application = SnapshotApplication(application)